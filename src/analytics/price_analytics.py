@@ -0,0 +1,156 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import logging
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Source field for each column, per collection
+FIELD_MAP = {
+    'airbnb': {
+        'name': 'listing.name',
+        'price': 'listing.price',
+        'rating': 'listing.rating',
+    },
+    'booking': {
+        'name': 'name',
+        'price': 'price',
+        'rating': 'rating',
+    },
+}
+
+# Fields shared by both collections
+COMMON_FIELDS = {
+    'start_date': 'start_date',
+    'end_date': 'end_date',
+    'scraped_at': 'timestamp',
+}
+
+COLUMNS = ['site', 'name', 'price', 'rating', 'start_date', 'end_date', 'scraped_at']
+
+DEFAULT_PERCENTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+def _get_path(doc: Dict, path: str):
+    value = doc
+    for key in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def listings_to_frame(docs: Iterable[Dict], site: str) -> pd.DataFrame:
+    """Build a typed DataFrame from listing documents of one collection
+
+    Prices and ratings that are not numbers (e.g. 'N/A') become NaN, dates
+    become datetimes and the site is a categorical column.
+    """
+    fields = {**FIELD_MAP[site], **COMMON_FIELDS}
+    columns: Dict[str, List] = {column: [] for column in fields}
+    for doc in docs:
+        for column, path in fields.items():
+            columns[column].append(_get_path(doc, path))
+
+    df = pd.DataFrame(columns)
+    df.insert(0, 'site', site)
+    return _apply_types(df)
+
+
+def _apply_types(df: pd.DataFrame) -> pd.DataFrame:
+    df['site'] = pd.Categorical(df['site'], categories=list(FIELD_MAP))
+    df['name'] = df['name'].astype('string')
+    df['price'] = pd.to_numeric(df['price'], errors='coerce').astype('float64')
+    df['rating'] = pd.to_numeric(df['rating'], errors='coerce').astype('float64')
+    df['start_date'] = pd.to_datetime(df['start_date'], format='%Y-%m-%d', errors='coerce')
+    df['end_date'] = pd.to_datetime(df['end_date'], format='%Y-%m-%d', errors='coerce')
+    df['scraped_at'] = pd.to_datetime(df['scraped_at'], errors='coerce', format='ISO8601')
+    # Zero or negative prices are missing values, as in calculate_*_price_analyses
+    df.loc[df['price'] <= 0, 'price'] = float('nan')
+    return df[COLUMNS]
+
+
+def load_listings_frame(mongo_client, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                        batch_size: int = 5000) -> pd.DataFrame:
+    """Stream both listings collections into one columnar DataFrame
+
+    Only the needed fields are projected and documents are consumed from the
+    cursor in batches, so the raw documents are never held in memory together.
+
+    Args:
+        mongo_client (MongoDBClient): Client to read from
+        start_date (str): Optional first checkin date in YYYY-MM-DD format
+        end_date (str): Optional last checkout date in YYYY-MM-DD format
+        batch_size (int): Cursor batch size
+
+    Returns:
+        pd.DataFrame: One row per listing observation with COLUMNS
+    """
+    query = {}
+    if start_date:
+        query['start_date'] = {'$gte': start_date}
+    if end_date:
+        query['end_date'] = {'$lte': end_date}
+
+    frames = []
+    for site, fields in FIELD_MAP.items():
+        projection = {path: 1 for path in {**fields, **COMMON_FIELDS}.values()}
+        projection['_id'] = 0
+        cursor = mongo_client.db[site].find(query, projection, batch_size=batch_size)
+        frames.append(listings_to_frame(cursor, site))
+
+    df = pd.concat(frames, ignore_index=True)
+    df['site'] = pd.Categorical(df['site'], categories=list(FIELD_MAP))
+    logger.info(f"Loaded {len(df)} listings into the analytics frame")
+    return df
+
+
+def price_percentiles(df: pd.DataFrame, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> pd.DataFrame:
+    """Price percentiles per site (rows: site, columns: percentile)"""
+    result = df.groupby('site', observed=True)['price'].quantile(list(percentiles)).unstack()
+    result.columns = [f"p{int(p * 100)}" for p in result.columns]
+    return result
+
+
+def price_curves(df: pd.DataFrame, stat: str = 'median') -> pd.DataFrame:
+    """Price per checkin date for each site (rows: checkin date, columns: site)"""
+    return df.pivot_table(index='start_date', columns='site', values='price', aggfunc=stat, observed=True)
+
+
+def occupancy_proxy(df: pd.DataFrame) -> pd.DataFrame:
+    """Number of distinct listings offered per night for each site
+
+    Fewer listings on offer for a night suggests more of the area is booked.
+    """
+    return (
+        df.drop_duplicates(['site', 'name', 'start_date'])
+        .pivot_table(index='start_date', columns='site', values='name', aggfunc='count', observed=True)
+        .fillna(0)
+        .astype('int64')
+    )
+
+
+def site_spreads(df: pd.DataFrame, stat: str = 'median') -> pd.DataFrame:
+    """Airbnb vs Booking price spread per checkin date
+
+    Returns:
+        pd.DataFrame: airbnb and booking price, absolute spread and airbnb/booking ratio
+    """
+    curves = price_curves(df, stat).reindex(columns=['airbnb', 'booking'])
+    curves['spread'] = curves['airbnb'] - curves['booking']
+    curves['ratio'] = curves['airbnb'] / curves['booking']
+    return curves.dropna(subset=['airbnb', 'booking'])
+
+
+def summarise(df: pd.DataFrame) -> Dict:
+    """Headline figures for the whole frame"""
+    prices = df.groupby('site', observed=True)['price']
+    return {
+        'listings': prices.size().to_dict(),
+        'listings_with_price': prices.count().to_dict(),
+        'mean_price': prices.mean().round(2).to_dict(),
+        'percentiles': price_percentiles(df).round(2).to_dict(orient='index'),
+        'nights': int(df['start_date'].nunique()),
+    }
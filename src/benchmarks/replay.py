@@ -0,0 +1,163 @@
+from playwright.async_api import BrowserContext, Route
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import html
+import json
+import logging
+import os
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Site host suffix -> fixture name (<name>.html in the fixture directory)
+FIXTURE_HOSTS = {
+    'booking.com': 'booking',
+    'airbnb.com': 'airbnb',
+}
+
+AIRBNB_MODES = ('structured', 'vision')
+
+COOKIE_BANNER = """
+<div id="cookie-banner"><button id="accept-cookies" onclick="this.parentNode.remove()">Accept</button></div>
+"""
+
+
+def synthetic_booking_page(cards: int = 25, pages: int = 1, offset: int = 0) -> str:
+    """Booking search results page with `cards` property cards using the live selectors
+
+    The header reports `pages` pages of results; `offset` is the first result on this page.
+    """
+    items = []
+    for i in range(offset, offset + cards):
+        items.append(f"""
+        <div data-testid="property-card">
+            <a data-testid="title-link" href="https://www.booking.com/hotel/pt/casa-do-geres-{i + 1}.en-gb.html">
+                <div data-testid="title">Casa do Gerês {i + 1}</div>
+            </a>
+            <span data-testid="price-and-discounted-price">€ {80 + (i * 7) % 120}</span>
+            <div data-testid="review-score">Scored {7 + (i % 30) / 10:.1f}</div>
+            <div data-testid="recommended-units">Entire holiday home · {1 + i % 3} bedrooms</div>
+        </div>""")
+    header = f"<h1>Gerês: {cards * pages} properties found</h1>"
+    return f"<html><head><title>Booking fixture</title></head><body>{COOKIE_BANNER}{header}{''.join(items)}</body></html>"
+
+
+def synthetic_airbnb_page(cards: int = 18, embed_state: bool = True, pages: int = 1, page: int = 0) -> str:
+    """Airbnb search results page
+
+    With `embed_state` the results are in the deferred state script, so the
+    structured extractor finds them. Without it the page only has rendered
+    text in #site-content, which forces the screenshot + Vision path. The
+    state lists one page cursor per page; `page` selects the results shown.
+    """
+    results = [
+        {
+            'listing': {
+                'id': str(1000 + i),
+                'name': f"Quinta das Oliveiras {i + 1}",
+                'structuredContent': {'primaryLine': [{'body': f"{1 + i % 4} beds"}]},
+            },
+            'avgRatingLocalized': f"4.{90 - i % 40} ({10 + i})",
+            'structuredDisplayPrice': {'primaryLine': {'price': f"€{90 + (i * 11) % 150}"}},
+        }
+        for i in range(page * cards, (page + 1) * cards)
+    ]
+    if embed_state:
+        pagination = {'pageCursors': [f"page-{n}" for n in range(pages)]}
+        state = json.dumps({'staysSearch': {'results': {'searchResults': results, 'paginationInfo': pagination}}})
+        body = f'<script id="data-deferred-state-0" type="application/json">{state}</script>'
+        content = "".join(f"<p>{html.escape(r['listing']['name'])}</p>" for r in results)
+    else:
+        body = ""
+        content = "".join(
+            f"<p style='font:20px sans-serif;color:#222;background:#e8f0ff'>{html.escape(r['listing']['name'])} "
+            f"{r['structuredDisplayPrice']['primaryLine']['price']} night</p>"
+            for r in results
+        )
+    return (
+        f"<html><head><title>Airbnb fixture</title></head><body>{COOKIE_BANNER}{body}"
+        f"<main id='site-content'>{content}</main></body></html>"
+    )
+
+
+def fixture_for_url(url: str) -> Optional[str]:
+    """Fixture name for the site a URL belongs to"""
+    host = urlparse(url).netloc.lower()
+    for suffix, name in FIXTURE_HOSTS.items():
+        if host == suffix or host.endswith('.' + suffix):
+            return name
+    return None
+
+
+class FixtureReplay:
+    """Serves recorded or synthetic search pages to Playwright instead of the network
+
+    Pass `setup_context` as the browser pool's `context_setup`. Documents for a
+    known site are fulfilled from the fixtures; every other request is aborted,
+    so a run never leaves the machine. With a HAR file, requests are replayed
+    from the recording instead and anything not recorded is aborted.
+    """
+
+    def __init__(self, fixture_dir: Optional[str] = None, har_path: Optional[str] = None,
+                 cards: int = 25, airbnb_mode: str = 'structured', pages: int = 1):
+        """
+        Args:
+            fixture_dir (str): Directory with recorded booking.html / airbnb.html pages
+            har_path (str): HAR recording to replay instead of the HTML fixtures
+            cards (int): Results per synthetic page when no recording is given
+            airbnb_mode (str): 'structured' embeds the search state, 'vision' forces the screenshot path
+            pages (int): Result pages per synthetic search
+        """
+        if airbnb_mode not in AIRBNB_MODES:
+            raise ValueError(f"Unknown Airbnb mode: {airbnb_mode}")
+        self.har_path = har_path
+        self.cards = cards
+        self.result_pages = max(1, pages)
+        # (fixture name, page number) -> HTML
+        self.pages: Dict[Tuple[str, int], str] = {}
+        for number in range(self.result_pages):
+            self.pages[('booking', number)] = synthetic_booking_page(cards, self.result_pages, number * cards)
+            self.pages[('airbnb', number)] = synthetic_airbnb_page(
+                cards, embed_state=airbnb_mode == 'structured', pages=self.result_pages, page=number
+            )
+        if fixture_dir:
+            for name in FIXTURE_HOSTS.values():
+                path = os.path.join(fixture_dir, f"{name}.html")
+                if os.path.exists(path):
+                    with open(path, encoding='utf-8') as f:
+                        self.pages[(name, 0)] = f.read()
+                    logger.info(f"Replaying recorded {name} page from {path}")
+        self.served = 0
+        self.aborted = 0
+
+    async def setup_context(self, context: BrowserContext) -> None:
+        """Install the replay routes on a new browser context"""
+        if self.har_path:
+            await context.route_from_har(self.har_path, not_found='abort')
+            return
+        await context.route("**/*", self._handle)
+
+    async def _handle(self, route: Route) -> None:
+        request = route.request
+        name = fixture_for_url(request.url)
+        body = self.pages.get((name, self._page_number(request.url))) if name else None
+        if body and request.resource_type == 'document':
+            self.served += 1
+            await route.fulfill(status=200, content_type='text/html; charset=utf-8', body=body)
+            return
+        self.aborted += 1
+        await route.abort()
+
+    def _page_number(self, url: str) -> int:
+        """Result page requested by a Booking offset or an Airbnb page cursor"""
+        query = parse_qs(urlparse(url).query)
+        if 'offset' in query:
+            return int(query['offset'][0]) // self.cards
+        if 'cursor' in query:
+            return int(query['cursor'][0].rsplit('-', 1)[-1])
+        return 0
+
+    def stats(self) -> Dict[str, int]:
+        return {'served': self.served, 'aborted': self.aborted}
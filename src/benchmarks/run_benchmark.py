@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from benchmarks.replay import AIRBNB_MODES, FixtureReplay
+from benchmarks.stubs import InMemoryMongoClient, StubVisionParser
+from database.mongo_db import MongoDBClient
+from main import SITES, URL_BUILDERS, RentalScraper
+from utils.browser_pool import BrowserPool
+from utils.scheduler import DateWindowScheduler, ScrapeJob, iter_date_windows
+from utils.scraping_utils import PlaywrightScraper
+from utils.metrics import close_metrics, get_metrics
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def throughput(stage: str, windows: int, listings: int, elapsed: float) -> Dict:
+    """Windows per minute and listings per second for one stage"""
+    return {
+        'stage': stage,
+        'windows': windows,
+        'listings': listings,
+        'seconds': round(elapsed, 2),
+        'windows_per_min': round(windows / elapsed * 60, 1) if elapsed else 0.0,
+        'listings_per_s': round(listings / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def benchmark_windows(count: int, start_date: str) -> List:
+    last_date = datetime.strptime(start_date, "%Y-%m-%d") + timedelta(days=count - 1)
+    return iter_date_windows(start_date, last_date.strftime("%Y-%m-%d"))
+
+
+async def bench_scrape_page(scraper: PlaywrightScraper, site: str, windows: List, concurrency: int) -> Dict:
+    """Time PlaywrightScraper.scrape_page alone over every window of one site"""
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = []
+
+    async def scrape(search_start_date: str, search_end_date: str) -> None:
+        async with semaphore:
+            url = URL_BUILDERS[site](search_start_date, search_end_date)
+            _, listings = await scraper.scrape_page(url, search_start_date, search_end_date)
+            counts.append(len(listings))
+
+    started = time.monotonic()
+    await asyncio.gather(*(scrape(start, end) for start, end in windows))
+    result = throughput(f"scrape_page[{site}]", len(windows), sum(counts), time.monotonic() - started)
+    result['empty_windows'] = sum(1 for count in counts if count == 0)
+    return result
+
+
+async def bench_end_to_end(rental_scraper: RentalScraper, windows: List, concurrency: int) -> Dict:
+    """Time RentalScraper through the scheduler, including the writes"""
+    scheduler = DateWindowScheduler(
+        rental_scraper.run_job,
+        concurrency={site: concurrency for site in SITES},
+        rate_limits={},
+        jitter=(0.0, 0.0),
+        max_retries=0,
+    )
+    for search_start_date, search_end_date in windows:
+        for site in SITES:
+            url = URL_BUILDERS[site](search_start_date, search_end_date)
+            scheduler.add_job(ScrapeJob(site, url, search_start_date, search_end_date))
+
+    started = time.monotonic()
+    jobs = await scheduler.run()
+    await rental_scraper.flush()
+    elapsed = time.monotonic() - started
+
+    result = throughput("end_to_end", len(jobs), sum(job.listings_count for job in jobs), elapsed)
+    result['failed_windows'] = sum(1 for job in jobs if job.status != "done")
+    result['writer'] = rental_scraper.writer.stats()
+    return result
+
+
+def print_results(results: List[Dict]) -> None:
+    header = f"{'stage':<22}{'windows':>9}{'listings':>10}{'seconds':>10}{'windows/min':>13}{'listings/s':>12}"
+    print(f"\n{header}\n{'-' * len(header)}")
+    for result in results:
+        print(f"{result['stage']:<22}{result['windows']:>9}{result['listings']:>10}{result['seconds']:>10}"
+              f"{result['windows_per_min']:>13}{result['listings_per_s']:>12}")
+
+
+async def run(args: argparse.Namespace) -> List[Dict]:
+    replay = FixtureReplay(fixture_dir=args.fixtures, har_path=args.har, cards=args.cards, airbnb_mode=args.airbnb_mode,
+                           pages=args.pages)
+    vision_parser = StubVisionParser(latency=args.vision_latency, listings=args.cards)
+    mongo_client: Optional[MongoDBClient] = MongoDBClient(uri=args.mongo_uri) if args.mongo_uri \
+        else InMemoryMongoClient(write_latency=args.write_latency)
+
+    browser_pool = BrowserPool(size=args.concurrency * len(SITES), headless=not args.headed,
+                               context_setup=replay.setup_context)
+    human_delay_ms = (args.human_delay_ms, args.human_delay_ms)
+    scraper = PlaywrightScraper(browser_pool, save_screenshots=False, human_delay_ms=human_delay_ms,
+                                vision_parser=vision_parser)
+    windows = benchmark_windows(args.windows, args.start_date)
+
+    results = []
+    rental_scraper = None
+    try:
+        await browser_pool.start(warm=browser_pool.size)
+        for site in SITES:
+            results.append(await bench_scrape_page(scraper, site, windows, args.concurrency))
+
+        rental_scraper = RentalScraper(concurrency=args.concurrency, mongo_client=mongo_client, scraper=scraper,
+                                       parse_workers=args.parse_workers)
+        results.append(await bench_end_to_end(rental_scraper, windows, args.concurrency))
+    finally:
+        if rental_scraper:
+            await rental_scraper.close()
+        else:
+            await scraper.close()
+        await browser_pool.close()
+        mongo_client.close()
+
+    logger.info(f"Replay: {replay.stats()}, vision stub calls: {vision_parser.calls}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the scraper offline against replayed pages')
+    parser.add_argument('--windows', type=int, default=10, help='Date windows per site')
+    parser.add_argument('--start-date', type=str, default='2025-06-01', help='First checkin date')
+    parser.add_argument('--concurrency', type=int, default=2, help='Windows scraped at once per site')
+    parser.add_argument('--parse-workers', type=int, default=2, help='Parse stage workers for the end-to-end run')
+    parser.add_argument('--cards', type=int, default=25, help='Results per synthetic page')
+    parser.add_argument('--pages', type=int, default=1, help='Result pages per synthetic search')
+    parser.add_argument('--airbnb-mode', choices=AIRBNB_MODES, default='structured',
+                        help='Serve Airbnb pages with embedded data or force the screenshot + Vision path')
+    parser.add_argument('--vision-latency', type=float, default=2.0, help='Seconds per stub Vision parse')
+    parser.add_argument('--write-latency', type=float, default=0.0, help='Seconds per in-memory bulk write')
+    parser.add_argument('--human-delay-ms', type=int, default=0, help='Human jitter per pause in milliseconds')
+    parser.add_argument('--fixtures', type=str, help='Directory with recorded booking.html / airbnb.html pages')
+    parser.add_argument('--har', type=str, help='HAR recording to replay instead of the HTML fixtures')
+    parser.add_argument('--mongo-uri', type=str, help='Write to this MongoDB (e.g. a local mongod) instead of memory')
+    parser.add_argument('--headed', action='store_true', help='Show the browser window')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results)
+        print(f"\n{get_metrics().summary_table()}")
+    close_metrics()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Dict, List, Union
+from database.mongo_db import LISTING_IDENTITY, get_listing_key, get_listing_name, normalise_name
+from scrapers.hotels import Listing
+
+import asyncio
+import logging
+import threading
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class StubVisionParser:
+    """Stands in for the Gemini Vision parser with a fixed latency and canned listings"""
+
+    def __init__(self, latency: float = 2.0, listings: int = 18):
+        """
+        Args:
+            latency (float): Seconds each parse takes, roughly a Gemini round trip
+            listings (int): Listings returned per screenshot
+        """
+        self.latency = latency
+        self.listings = listings
+        self.calls = 0
+        self.bytes_parsed = 0
+
+    async def __call__(self, image: Union[bytes, str]) -> List[Listing]:
+        self.calls += 1
+        if isinstance(image, bytes):
+            self.bytes_parsed += len(image)
+        await asyncio.sleep(self.latency)
+        return [
+            Listing(name=f"Stub listing {i + 1}", price=80.0 + i, rating=4.5, bed_configuration="2 beds")
+            for i in range(self.listings)
+        ]
+
+
+class InMemoryMongoClient:
+    """Dictionary-backed stand-in for MongoDBClient's write path
+
+    Listings are upserted on the same identity as MongoDBClient.insert_listings.
+    `write_latency` adds a per-call delay to mimic a round trip to Atlas.
+    """
+
+    def __init__(self, write_latency: float = 0.0):
+        self.write_latency = write_latency
+        self.collections: Dict[str, Dict[tuple, Dict]] = {}
+        self.write_calls = 0
+        self._lock = threading.Lock()
+
+    def ensure_indexes(self) -> None:
+        pass
+
+    def insert_listings(self, listings: List, collection_name: str, upsert: bool = True, **kwargs) -> Dict[str, int]:
+        if self.write_latency:
+            time.sleep(self.write_latency)
+        now = datetime.now().isoformat()
+        counts = {'inserted': 0, 'updated': 0}
+        with self._lock:
+            self.write_calls += 1
+            collection = self.collections.setdefault(collection_name, {})
+            for listing in listings:
+                listing_dict = listing.model_dump() if hasattr(listing, 'model_dump') else dict(listing)
+                listing_dict['site'] = collection_name
+                listing_dict['name_key'] = normalise_name(get_listing_name(listing_dict))
+                listing_dict['listing_key'] = get_listing_key(listing_dict)
+                identity = tuple(listing_dict.get(key) for key in LISTING_IDENTITY)
+                if not upsert or listing_dict['listing_key'] is None:
+                    identity = identity + (len(collection),)
+                if identity in collection:
+                    counts['updated'] += 1
+                else:
+                    listing_dict['inserted_at'] = now
+                    counts['inserted'] += 1
+                collection[identity] = {**collection.get(identity, {}), **listing_dict, 'updated_at': now}
+        return counts
+
+    def count(self, collection_name: str) -> int:
+        return len(self.collections.get(collection_name, {}))
+
+    def close(self) -> None:
+        self.collections.clear()
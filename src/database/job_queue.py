@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from typing import Dict, Iterable, List, Optional
+
+import logging
+import os
+import socket
+import uuid
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+QUEUE_COLLECTION = 'scrape_jobs'
+
+
+def _now() -> datetime:
+    # Leases are compared across hosts, so they are kept in UTC
+    return datetime.now(timezone.utc)
+
+
+class JobQueue:
+    """Scrape windows shared by several worker processes through a MongoDB collection
+
+    Each (site, checkin, checkout) window is one document. A worker claims a
+    job atomically with find_one_and_update, which gives it a lease of
+    `lease_seconds`; it keeps the lease alive with heartbeats while the job
+    runs. A job whose lease expired (its worker died or hung) is claimed
+    again by the next worker, until it has been attempted `max_attempts` times.
+    """
+
+    def __init__(self, mongo_client, worker_id: Optional[str] = None, lease_seconds: float = 300,
+                 max_attempts: int = 3):
+        """
+        Args:
+            mongo_client (MongoDBClient): Client holding the queue collection
+            worker_id (str): Name of this worker, defaults to <host>-<pid>-<random>
+            lease_seconds (float): How long a claim stays valid without a heartbeat
+            max_attempts (int): Claims allowed per job before it is left as failed
+        """
+        self.mongo_client = mongo_client
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+
+    @property
+    def jobs(self):
+        return self.mongo_client.db[QUEUE_COLLECTION]
+
+    def ensure_indexes(self) -> None:
+        self.jobs.create_index(
+            [('site', ASCENDING), ('checkin', ASCENDING), ('checkout', ASCENDING)],
+            name='job_key', unique=True
+        )
+        self.jobs.create_index([('status', ASCENDING), ('checkin', ASCENDING)], name='status_checkin')
+
+    def enqueue(self, jobs: Iterable, reset: bool = False) -> int:
+        """Add scrape jobs to the queue
+
+        Args:
+            jobs (Iterable[ScrapeJob]): Jobs to add
+            reset (bool): Queue jobs again even if they are already done or failed
+
+        Returns:
+            int: Number of jobs newly queued or reset
+        """
+        now = _now()
+        requests = []
+        for job in jobs:
+            key = {'site': job.site, 'checkin': job.start_date, 'checkout': job.end_date}
+            queued = {'status': 'queued', 'attempts': 0, 'error': None, 'queued_at': now}
+            if reset:
+                update = {'$set': {**queued, 'url': job.url}, '$setOnInsert': {'created_at': now}}
+                # Never take a job away from a worker that is running it
+                key['status'] = {'$ne': 'running'}
+            else:
+                update = {'$setOnInsert': {**queued, 'url': job.url, 'created_at': now}}
+            requests.append(UpdateOne(key, update, upsert=True))
+        if not requests:
+            return 0
+
+        try:
+            result = self.jobs.bulk_write(requests, ordered=False)
+            queued = result.upserted_count + (result.modified_count if reset else 0)
+        except Exception as e:
+            # With reset, a running job matches no document and its upsert hits the unique key
+            details = getattr(e, 'details', None) or {}
+            errors = details.get('writeErrors', [])
+            if not errors or any(error.get('code') != 11000 for error in errors):
+                logger.error(f"Failed to enqueue jobs: {str(e)}")
+                raise
+            queued = details.get('nUpserted', 0) + details.get('nModified', 0)
+        logger.info(f"Queued {queued} of {len(requests)} jobs")
+        return queued
+
+    def claim(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Optional[Dict]:
+        """Atomically take the next queued or expired job in a checkin range
+
+        Returns:
+            Optional[Dict]: The claimed job document, None if nothing is available
+        """
+        now = _now()
+        query = {
+            '$or': [
+                {'status': 'queued'},
+                {'status': 'running', 'lease_expires_at': {'$lt': now}},
+            ],
+            'attempts': {'$lt': self.max_attempts},
+        }
+        if start_date or end_date:
+            query['checkin'] = {}
+            if start_date:
+                query['checkin']['$gte'] = start_date
+            if end_date:
+                query['checkin']['$lte'] = end_date
+
+        job = self.jobs.find_one_and_update(
+            query,
+            {
+                '$set': {
+                    'status': 'running',
+                    'worker_id': self.worker_id,
+                    'claimed_at': now,
+                    'heartbeat_at': now,
+                    'lease_expires_at': now + self.lease,
+                },
+                '$inc': {'attempts': 1},
+            },
+            sort=[('checkin', ASCENDING), ('site', ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if job and job.get('attempts', 0) > 1:
+            logger.info(f"Reclaimed {job['site']} {job['checkin']} (attempt {job['attempts']})")
+        return job
+
+    def heartbeat(self, job_ids: List) -> int:
+        """Extend the leases of jobs this worker is still running
+
+        Returns:
+            int: Number of leases extended; fewer than asked means some were lost to another worker
+        """
+        if not job_ids:
+            return 0
+        now = _now()
+        result = self.jobs.update_many(
+            {'_id': {'$in': list(job_ids)}, 'worker_id': self.worker_id, 'status': 'running'},
+            {'$set': {'heartbeat_at': now, 'lease_expires_at': now + self.lease}},
+        )
+        return result.matched_count
+
+    def complete(self, job_id, listings_count: int) -> bool:
+        """Mark a claimed job done; False if the lease was lost in the meantime"""
+        result = self.jobs.update_one(
+            {'_id': job_id, 'worker_id': self.worker_id, 'status': 'running'},
+            {'$set': {'status': 'done', 'finished_at': _now(), 'listings_count': listings_count, 'error': None}},
+        )
+        return result.matched_count == 1
+
+    def fail(self, job_id, error: str) -> bool:
+        """Give a claimed job back to the queue, or leave it failed once it has no attempts left"""
+        job = self.jobs.find_one({'_id': job_id, 'worker_id': self.worker_id, 'status': 'running'}, {'attempts': 1})
+        if not job:
+            return False
+        status = 'failed' if job.get('attempts', 0) >= self.max_attempts else 'queued'
+        result = self.jobs.update_one(
+            {'_id': job_id, 'worker_id': self.worker_id, 'status': 'running'},
+            {'$set': {'status': status, 'finished_at': _now(), 'error': error}},
+        )
+        return result.matched_count == 1
+
+    def requeue_expired(self) -> int:
+        """Put jobs whose worker stopped sending heartbeats back in the queue
+
+        Claims already take over expired jobs, so this is only needed to keep
+        the status counts honest (or to fail jobs with no attempts left).
+        """
+        now = _now()
+        expired = {'status': 'running', 'lease_expires_at': {'$lt': now}}
+        failed = self.jobs.update_many(
+            {**expired, 'attempts': {'$gte': self.max_attempts}},
+            {'$set': {'status': 'failed', 'error': 'Lease expired', 'finished_at': now}},
+        ).modified_count
+        requeued = self.jobs.update_many(expired, {'$set': {'status': 'queued'}}).modified_count
+        if failed or requeued:
+            logger.info(f"Requeued {requeued} expired jobs, {failed} out of attempts")
+        return requeued
+
+    def counts(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, int]:
+        """Number of jobs per status in a checkin range"""
+        match = {}
+        if start_date or end_date:
+            match['checkin'] = {}
+            if start_date:
+                match['checkin']['$gte'] = start_date
+            if end_date:
+                match['checkin']['$lte'] = end_date
+        pipeline = [{'$match': match}, {'$group': {'_id': '$status', 'count': {'$sum': 1}}}]
+        return {doc['_id']: doc['count'] for doc in self.jobs.aggregate(pipeline)}
+
+    def has_unfinished(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> bool:
+        """Whether any job in the range is still queued, running, or could be retried"""
+        counts = self.counts(start_date, end_date)
+        return bool(counts.get('queued') or counts.get('running'))
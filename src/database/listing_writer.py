@@ -0,0 +1,166 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from database.mongo_db import MongoDBClient
+
+import asyncio
+import logging
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class _Submission:
+    """Listings handed over by one submit call and the callback to run once they are written"""
+
+    def __init__(self, count: int, on_written: Optional[Callable[[bool, Optional[str]], None]]):
+        self.remaining = count
+        self.failed = False
+        self.error: Optional[str] = None
+        self.on_written = on_written
+
+
+class AsyncListingWriter:
+    """Write-behind persistence stage for scraped listings
+
+    Scrapes hand their listings to `submit` and carry on; a background task
+    batches listings from many scrapes and writes them with the blocking
+    pymongo client on a dedicated thread. A batch is flushed when it reaches
+    `batch_size` listings or `flush_interval` seconds after its first listing.
+    When `max_pending` listings are waiting, `submit` blocks until the writer
+    catches up.
+    """
+
+    def __init__(
+        self,
+        mongo_client: MongoDBClient,
+        batch_size: int = 500,
+        flush_interval: float = 2.0,
+        max_pending: int = 2000,
+    ):
+        """
+        Args:
+            mongo_client (MongoDBClient): Client used for the bulk writes
+            batch_size (int): Listings per flush
+            flush_interval (float): Maximum seconds a listing waits before being flushed
+            max_pending (int): Queue capacity in listings before submit applies backpressure
+        """
+        self.mongo_client = mongo_client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def start(self) -> None:
+        """Start the background writer"""
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="listing-writer")
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, listings: List, site: str,
+                     on_written: Optional[Callable[[bool, Optional[str]], None]] = None) -> None:
+        """Queue listings for writing, waiting if the queue is full
+
+        Args:
+            listings (List): Listings to write
+            site (str): Target collection
+            on_written: Called on the writer thread with (True, None) once all these listings
+                        are written, or with False and the error if any of them failed or there were none
+        """
+        await self.start()
+        submission = _Submission(len(listings), on_written)
+        if not listings:
+            # Nothing was written, so the window must not be recorded as done
+            submission.failed = True
+            submission.error = "No listings to write"
+            await self._notify(submission)
+            return
+        for listing in listings:
+            await self._queue.put((site, listing, submission))
+
+    async def _notify(self, submission: _Submission) -> None:
+        if submission.on_written is None:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, submission.on_written, not submission.failed, submission.error
+            )
+        except Exception as e:
+            logger.error(f"Listing writer callback failed: {str(e)}")
+
+    async def flush(self) -> None:
+        """Wait until every submitted listing has been written"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _next_batch(self) -> List[Tuple[str, Dict, _Submission]]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            by_site: Dict[str, List] = {}
+            for site, listing, submission in batch:
+                by_site.setdefault(site, []).append((listing, submission))
+
+            for site, items in by_site.items():
+                listings = [listing for listing, _ in items]
+                try:
+                    await loop.run_in_executor(self._executor, self.mongo_client.insert_listings, listings, site)
+                    self.written += len(listings)
+                except Exception as e:
+                    self.failed += len(listings)
+                    for _, submission in items:
+                        submission.failed = True
+                        submission.error = f"Failed to write listings: {str(e)}"
+                    logger.error(f"Failed to write {len(listings)} {site} listings: {str(e)}")
+
+                for _, submission in items:
+                    submission.remaining -= 1
+                    if submission.remaining == 0:
+                        await self._notify(submission)
+            self.batches += 1
+
+            for _ in batch:
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'written': self.written,
+            'failed': self.failed,
+            'batches': self.batches,
+            'pending': self._queue.qsize() if self._queue else 0,
+        }
+
+    async def close(self) -> None:
+        """Flush pending listings and stop the writer"""
+        if self._task is None:
+            return
+        await self.flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._executor.shutdown(wait=True)
+        self._task = None
+        self._queue = None
+        logger.info(f"Listing writer closed: {self.stats()}")
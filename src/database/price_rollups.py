@@ -0,0 +1,138 @@
+from pymongo import UpdateOne
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import math
+
+ROLLUP_COLLECTION = 'price_rollups'
+
+# One marker per (listing identity, scrape day) already folded into the rollups
+OBSERVATION_COLLECTION = 'price_observations'
+OBSERVATION_TTL_SECONDS = 3 * 24 * 3600
+
+# Relative accuracy of the quantile sketch (2% of the true value)
+SKETCH_ACCURACY = 0.02
+
+
+class QuantileSketch:
+    """Mergeable log-bucketed histogram for price quantiles
+
+    Each positive value falls into bucket ceil(log_gamma(value)), so any
+    quantile can be answered within SKETCH_ACCURACY relative error. Two
+    sketches are merged by adding their bucket counts, which is what lets the
+    rollups be maintained with $inc.
+    """
+
+    gamma = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+
+    def __init__(self, buckets: Optional[Dict[str, int]] = None):
+        self.buckets: Dict[str, int] = dict(buckets or {})
+
+    @classmethod
+    def bucket(cls, value: float) -> str:
+        """Bucket key for a positive value (stored as a string for MongoDB field names)"""
+        return str(math.ceil(math.log(value) / math.log(cls.gamma)))
+
+    @classmethod
+    def bucket_value(cls, bucket: str) -> float:
+        """Representative value of a bucket"""
+        index = int(bucket)
+        return 2 * cls.gamma ** index / (cls.gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        key = self.bucket(value)
+        self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = sum(self.buckets.values())
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for key in sorted(self.buckets, key=int):
+            seen += self.buckets[key]
+            if seen > rank:
+                return round(self.bucket_value(key), 2)
+        return round(self.bucket_value(max(self.buckets, key=int)), 2)
+
+
+def get_price(listing: Dict, price_field: str) -> Optional[float]:
+    """Positive numeric price at a dotted path, None otherwise"""
+    value = listing
+    for key in price_field.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+        return float(value)
+    return None
+
+
+def get_scrape_day(listing: Dict, default: str = '') -> str:
+    """Day the listing was scraped (YYYY-MM-DD)"""
+    return str(listing.get('timestamp') or listing.get('inserted_at') or default)[:10]
+
+
+def build_rollups(site: str, listings: Iterable[Dict], price_field: str, default_day: str = '') -> Dict[Tuple[str, str], Dict]:
+    """Aggregate listings into rollups keyed by (checkin date, scrape day)"""
+    rollups: Dict[Tuple[str, str], Dict] = {}
+    for listing in listings:
+        price = get_price(listing, price_field)
+        if price is None:
+            continue
+        key = (listing.get('start_date'), get_scrape_day(listing, default_day))
+        rollup = rollups.setdefault(key, {
+            'site': site, 'checkin': key[0], 'scrape_day': key[1],
+            'count': 0, 'sum': 0.0, 'min': price, 'max': price, 'sketch': QuantileSketch(),
+        })
+        rollup['count'] += 1
+        rollup['sum'] += price
+        rollup['min'] = min(rollup['min'], price)
+        rollup['max'] = max(rollup['max'], price)
+        rollup['sketch'].add(price)
+    return rollups
+
+
+def rollup_updates(site: str, listings: Iterable[Dict], price_field: str, default_day: str = '') -> List[UpdateOne]:
+    """Incremental $inc/$min/$max updates that fold listings into the rollups"""
+    updates = []
+    for (checkin, scrape_day), rollup in build_rollups(site, listings, price_field, default_day).items():
+        inc = {'count': rollup['count'], 'sum': rollup['sum']}
+        for bucket, count in rollup['sketch'].buckets.items():
+            inc[f"sketch.{bucket}"] = count
+        updates.append(UpdateOne(
+            {'site': site, 'checkin': checkin, 'scrape_day': scrape_day},
+            {'$inc': inc, '$min': {'min': rollup['min']}, '$max': {'max': rollup['max']}},
+            upsert=True
+        ))
+    return updates
+
+
+def rollup_documents(site: str, listings: Iterable[Dict], price_field: str) -> List[Dict]:
+    """Complete rollup documents, used when rebuilding from raw listings"""
+    documents = []
+    for rollup in build_rollups(site, listings, price_field).values():
+        rollup['sketch'] = rollup['sketch'].buckets
+        documents.append(rollup)
+    return documents
+
+
+def merge_rollups(rollups: Sequence[Dict], quantiles: Sequence[float] = (0.25, 0.5, 0.75, 0.9)) -> Dict:
+    """Combine rollup documents into one set of statistics"""
+    if not rollups:
+        return {'count': 0, 'average_price': 0, 'lowest_price': 0, 'highest_price': 0, 'quantiles': {}}
+
+    sketch = QuantileSketch()
+    for rollup in rollups:
+        sketch.merge(QuantileSketch(rollup.get('sketch')))
+    count = sum(rollup['count'] for rollup in rollups)
+    return {
+        'count': count,
+        'average_price': round(sum(rollup['sum'] for rollup in rollups) / count, 2) if count else 0,
+        'lowest_price': min(rollup['min'] for rollup in rollups),
+        'highest_price': max(rollup['max'] for rollup in rollups),
+        'quantiles': {f"p{int(q * 100)}": sketch.quantile(q) for q in quantiles},
+    }
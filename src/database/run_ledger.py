@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING
+from typing import Dict, Optional, Set, Tuple
+
+import logging
+import uuid
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+LEDGER_COLLECTION = 'scrape_ledger'
+RUNS_COLLECTION = 'scrape_runs'
+
+
+class RunLedger:
+    """Records the outcome of every (site, checkin, checkout) scrape job
+
+    A window that finished within `ttl_hours` is considered fresh and skipped.
+    When resuming, windows finished since the interrupted run started are
+    skipped as well, whatever their age, so the run picks up where it stopped.
+    """
+
+    def __init__(self, mongo_client, ttl_hours: float = 12):
+        """
+        Args:
+            mongo_client (MongoDBClient): Client holding the ledger collections
+            ttl_hours (float): How long a finished window stays fresh
+        """
+        self.mongo_client = mongo_client
+        self.ttl = timedelta(hours=ttl_hours)
+        self.run_id: Optional[str] = None
+        self.checkpoint: Optional[str] = None
+
+    @property
+    def jobs(self):
+        return self.mongo_client.db[LEDGER_COLLECTION]
+
+    @property
+    def runs(self):
+        return self.mongo_client.db[RUNS_COLLECTION]
+
+    def ensure_indexes(self) -> None:
+        self.jobs.create_index(
+            [('site', ASCENDING), ('checkin', ASCENDING), ('checkout', ASCENDING)],
+            name='job_key', unique=True
+        )
+        self.runs.create_index([('start_date', ASCENDING), ('end_date', ASCENDING), ('started_at', DESCENDING)])
+
+    def start_run(self, start_date: str, end_date: str, resume: bool = False) -> str:
+        """Open a run for a date range, reusing the last unfinished one when resuming
+
+        Returns:
+            str: The run id
+        """
+        now = datetime.now().isoformat()
+        if resume:
+            previous = self.runs.find_one(
+                {'start_date': start_date, 'end_date': end_date, 'status': {'$ne': 'completed'}},
+                sort=[('started_at', DESCENDING)]
+            )
+            if previous:
+                self.run_id = previous['run_id']
+                self.checkpoint = previous['started_at']
+                self.runs.update_one({'run_id': self.run_id}, {'$set': {'status': 'running', 'resumed_at': now}})
+                logger.info(f"Resuming run {self.run_id} started at {self.checkpoint}")
+                return self.run_id
+            logger.info("No interrupted run found for this range, starting a new one")
+
+        self.run_id = uuid.uuid4().hex
+        self.checkpoint = None
+        self.runs.insert_one({
+            'run_id': self.run_id,
+            'start_date': start_date,
+            'end_date': end_date,
+            'status': 'running',
+            'started_at': now,
+        })
+        return self.run_id
+
+    def finish_run(self, jobs_done: int, jobs_failed: int) -> None:
+        """Close the current run; it only counts as completed when no job failed"""
+        if not self.run_id:
+            return
+        self.runs.update_one({'run_id': self.run_id}, {'$set': {
+            'status': 'completed' if jobs_failed == 0 else 'incomplete',
+            'finished_at': datetime.now().isoformat(),
+            'jobs_done': jobs_done,
+            'jobs_failed': jobs_failed,
+        }})
+
+    def completed_windows(self, start_date: str, end_date: str) -> Set[Tuple[str, str, str]]:
+        """Windows in a range that do not need scraping again
+
+        Returns:
+            Set[Tuple[str, str, str]]: (site, checkin, checkout) of fresh windows
+        """
+        cutoff = (datetime.now() - self.ttl).isoformat()
+        if self.checkpoint:
+            cutoff = min(cutoff, self.checkpoint)
+        query = {
+            'checkin': {'$gte': start_date, '$lte': end_date},
+            'status': 'done',
+            'finished_at': {'$gte': cutoff},
+        }
+        return {
+            (doc['site'], doc['checkin'], doc['checkout'])
+            for doc in self.jobs.find(query, {'site': 1, 'checkin': 1, 'checkout': 1})
+        }
+
+    def _update(self, site: str, checkin: str, checkout: str, fields: Dict, inc: Optional[Dict] = None) -> None:
+        update = {'$set': {**fields, 'run_id': self.run_id, 'updated_at': datetime.now().isoformat()}}
+        if inc:
+            update['$inc'] = inc
+        self.jobs.update_one({'site': site, 'checkin': checkin, 'checkout': checkout}, update, upsert=True)
+
+    def mark_started(self, site: str, checkin: str, checkout: str) -> None:
+        self._update(site, checkin, checkout, {
+            'status': 'running', 'started_at': datetime.now().isoformat(), 'error': None
+        }, inc={'attempts': 1})
+
+    def mark_done(self, site: str, checkin: str, checkout: str, listings_count: int) -> None:
+        self._update(site, checkin, checkout, {
+            'status': 'done', 'finished_at': datetime.now().isoformat(), 'listings_count': listings_count
+        })
+
+    def mark_failed(self, site: str, checkin: str, checkout: str, error: str) -> None:
+        self._update(site, checkin, checkout, {
+            'status': 'failed', 'finished_at': datetime.now().isoformat(), 'error': error
+        })
@@ -1,13 +1,20 @@
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
-from typing import List, Dict
-from utils.scraping_utils import PlaywrightScraper
-from database.mongo_db import MongoDBClient
-from bson import json_util
-from scrapers.airbnb import calculate_airbnb_price_analyses
-from scrapers.booking import calculate_booking_price_analyses
+from typing import Callable, List, Optional
+from utils.scraping_utils import PageCapture, PlaywrightScraper
+from utils.browser_pool import get_browser_pool, close_browser_pool
+from utils.scheduler import DateWindowScheduler, OnFinished, ScrapeJob, iter_date_windows
+from utils.queue_worker import QueueWorker
+from database.mongo_db import MongoDBClient, get_mongo_client, close_mongo_client
+from database.listing_writer import AsyncListingWriter
+from database.run_ledger import RunLedger
+from database.job_queue import JobQueue
+from parsers.vision_cache import get_vision_cache
+from parsers.gemini_limiter import get_gemini_limiter
+from utils.listing_exporter import EXPORT_FORMATS, ListingExporter
+from utils.metrics import get_metrics, close_metrics
 
 import asyncio
+import functools
 import logging
 import argparse
 
@@ -17,99 +24,401 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+SITES = ("airbnb", "booking")
+
+def build_airbnb_url(search_start_date: str, search_end_date: str) -> str:
+    """Build the Airbnb search URL for a checkin/checkout window"""
+    return f'https://www.airbnb.com/s/Ger%C3%AAs--Portugal/homes?refinement_paths%5B%5D=%2Fhomes&flexible_trip_lengths%5B%5D=one_week&monthly_start_date=2025-02-01&monthly_length=3&monthly_end_date=2025-05-01&price_filter_input_type=0&channel=EXPLORE&query=Ger%C3%AAs&date_picker_type=calendar&checkin={search_start_date}&checkout={search_end_date}&source=structured_search_input_header&search_type=autocomplete_click&price_filter_num_nights=1&room_types%5B%5D=Entire%20home%2Fapt&selected_filter_order%5B%5D=room_types%3AEntire%20home%2Fapt&selected_filter_order%5B%5D=l2_property_type_ids%3A1&update_selected_filters=true&zoom_level=10&l2_property_type_ids%5B%5D=1&place_id=ChIJXTwMUMIYJQ0RMAqBT8DrAAo&location_bb=Qibr%2B8ECku1CJuk4wQKd%2Bg%3D%3D'
+
+def build_booking_url(search_start_date: str, search_end_date: str) -> str:
+    """Build the Booking search URL for a checkin/checkout window"""
+    return f'https://www.booking.com/searchresults.en-gb.html?label=gen173nr-1BCAEoggI46AdIM1gEaLsBiAEBmAEJuAEZyAEM2AEB6AEBiAIBqAIDuAKMk5C8BsACAdICJGM2MDZhYjU5LTc2OTYtNDliZS1hZTA4LWJlMzVkNTRkMjJkYtgCBeACAQ&sid=6cc99139c41960236eadde3d7b3b1c9a&aid=304142&ss=Geres&ssne=Geres&ssne_untouched=Geres&efdco=1&lang=en-gb&src=index&dest_id=900040488&dest_type=city&checkin={search_start_date}&checkout={search_end_date}&group_adults=2&no_rooms=1&group_children=0&nflt=privacy_type%3D3'
+
+URL_BUILDERS = {
+    "airbnb": build_airbnb_url,
+    "booking": build_booking_url,
+}
+
 class RentalScraper:
-    def __init__(self):
+    """Scrapes windows as three overlapped stages: browser capture, parsing and persistence
+
+    The scheduler drives the capture stage through `run_job`. Captures are
+    handed to `parse_workers` parse workers through a bounded queue, and the
+    parsed listings go to the background writer, so the browser can load the
+    next window while Gemini parses the previous one and the writer saves the
+    one before. A full parse queue holds the capture stage back.
+    """
+
+    def __init__(self, concurrency: int = 1, mongo_client: Optional[MongoDBClient] = None,
+                 exporter: Optional[ListingExporter] = None, ledger: Optional[RunLedger] = None,
+                 scraper: Optional[PlaywrightScraper] = None, parse_workers: int = 2, parse_queue_size: int = 4):
         load_dotenv()
-        self.listings: List[Dict] = []
-        self.airbnb_scraper = PlaywrightScraper()
-        self.booking_scraper = PlaywrightScraper()
-        self.mongo_client = MongoDBClient()
-    
-    async def scrape_listings(self, url: str, start_date: str, end_date: str, scraper: PlaywrightScraper) -> None:
-        """Main scraping method"""
+        self.mongo_client = mongo_client or get_mongo_client()
+        self.exporter = exporter
+        self.ledger = ledger
+
+        # Listings are written in the background so scrapes never wait on Mongo
+        self.writer = AsyncListingWriter(self.mongo_client)
+
+        # One shared browser with a context per concurrent window
+        if scraper is None:
+            scraper = PlaywrightScraper(get_browser_pool(size=max(1, concurrency) * len(SITES)))
+        self.scraper = scraper
+
+        # Captures waiting for the parse stage
+        self.parse_workers = max(1, parse_workers)
+        self.parse_queue_size = max(1, parse_queue_size)
+        self._parse_queue: Optional[asyncio.Queue] = None
+        self._parse_tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the parse workers"""
+        if self._parse_queue is None:
+            self._parse_queue = asyncio.Queue(maxsize=self.parse_queue_size)
+            self._parse_tasks = [asyncio.create_task(self._parse_worker()) for _ in range(self.parse_workers)]
+
+    async def scrape_listings(self, url: str, start_date: str, end_date: str, scraper: PlaywrightScraper,
+                              on_written: Optional[Callable[[str, int, bool, Optional[str]], None]] = None) -> None:
+        """Capture a page and queue it for parsing and saving
+
+        The listings are only counted once parsed, which `on_written` reports.
+
+        Args:
+            on_written: Called with (site, listing count, success, error) once the listings are in MongoDB,
+                        or with success False and the error if they could not be parsed or written
+        """
         try:
-            site, listings = await scraper.scrape_page(url, start_date, end_date)
+            capture = await scraper.capture_page(url, start_date, end_date)
     
-            if site == "none":
-                print("Invalid URL. Scraping failed!")
-                return
+            if capture.site == "none":
+                raise ValueError(f"Invalid URL. Scraping failed for {url}")
 
-            self.save_to_json()
-            self.mongo_client.insert_listings(listings, site)
-            print(f"Scraping completed for {site}!")
+            await self.start()
+            await self._parse_queue.put((scraper, capture, on_written))
             
         except Exception as e:
             logger.error(f"An error occurred while scraping: {str(e)}")
             raise
-    
-    def save_to_json(self, filename: str = None) -> None:
-        """Save scraped data to JSON file"""
-        if not filename:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"json_listings/{timestamp}.json"
-        
-        if self.listings:
-            with open(filename, 'w', encoding='utf-8') as f:
-                # Use json_util.dumps directly to handle MongoDB-specific types
-                f.write(json_util.dumps(self.listings, indent=2))
-            logger.info(f"Data saved to {filename}")
-        else:
-            logger.warning("No data to save")
+
+    async def _parse_worker(self) -> None:
+        while True:
+            scraper, capture, on_written = await self._parse_queue.get()
+            try:
+                await self._parse_and_save(scraper, capture, on_written)
+            finally:
+                self._parse_queue.task_done()
+
+    async def _parse_and_save(self, scraper: PlaywrightScraper, capture: PageCapture,
+                              on_written: Optional[Callable[[str, int, bool, Optional[str]], None]]) -> None:
+        try:
+            site, listings = await scraper.parse_capture(capture)
+        except Exception as e:
+            logger.error(f"Failed to parse {capture.site} {capture.start_date}: {str(e)}")
+            if on_written:
+                await asyncio.to_thread(on_written, capture.site, 0, False, f"Failed to parse listings: {str(e)}")
+            return
+
+        if not listings and not capture.no_results:
+            # A Vision error, a blank screenshot or a bot wall, never a real empty search
+            if on_written:
+                await asyncio.to_thread(on_written, site, 0, False, "No listings parsed")
+            return
+
+        # The export is a side copy; failing it must not lose the MongoDB write
+        if self.exporter:
+            try:
+                await asyncio.to_thread(self.exporter.write, listings, site)
+            except Exception as e:
+                logger.error(f"Failed to export {site} {capture.start_date}: {str(e)}")
+
+        if not listings:
+            # The search itself is empty: nothing to write, and nothing to scrape again
+            logger.info(f"{site} {capture.start_date} -> {capture.end_date}: the search has no results")
+            if on_written:
+                await asyncio.to_thread(on_written, site, 0, True)
+            return
+
+        callback = None
+        if on_written:
+            callback = functools.partial(on_written, site, len(listings))
+        await self.writer.submit(listings, site, on_written=callback)
+        print(f"Scraping completed for {site}!")
+
+    async def flush(self) -> None:
+        """Wait until every captured page has been parsed and its listings written"""
+        if self._parse_queue is not None:
+            await self._parse_queue.join()
+        await self.writer.flush()
+
+    async def run_job(self, job: ScrapeJob, on_finished: Optional[OnFinished] = None) -> None:
+        """Run a scheduled job, recording its progress in the ledger
+
+        The job ends once the page is captured; the window is only marked done,
+        and its listings_count set, once its listings have been parsed and written.
+        A window the site reports as having no results is done with a count of 0;
+        any other window that yields no listings is marked failed, so the caller
+        can capture it again and the next run or --resume does if it still fails.
+
+        Args:
+            on_finished: Called with (success, listing count, error) once the listings are written,
+                         or once parsing or writing them failed
+        """
+        ledger = self.ledger
+        if ledger:
+            await asyncio.to_thread(ledger.mark_started, job.site, job.start_date, job.end_date)
+
+        def record_written(site: str, listings_count: int, success: bool, error: Optional[str] = None) -> None:
+            job.listings_count = listings_count
+            if not success:
+                job.error = error or "Failed to write listings"
+            if success and listings_count == 0:
+                logger.info(f"{site} {job.start_date} -> {job.end_date}: no results")
+            elif success:
+                logger.info(f"{site} {job.start_date} -> {job.end_date}: {listings_count} listings written")
+            else:
+                logger.warning(f"{site} {job.start_date} -> {job.end_date}: {job.error}")
+            if ledger and success:
+                ledger.mark_done(site, job.start_date, job.end_date, listings_count)
+            elif ledger:
+                ledger.mark_failed(site, job.start_date, job.end_date, job.error)
+            if on_finished:
+                on_finished(success, listings_count, None if success else job.error)
+
+        try:
+            await self.scrape_listings(job.url, job.start_date, job.end_date, self.scraper,
+                                       on_written=record_written)
+        except Exception as e:
+            if ledger:
+                await asyncio.to_thread(ledger.mark_failed, job.site, job.start_date, job.end_date, str(e))
+            raise
     
     async def close(self):
-        """Close all connections"""
-        if hasattr(self, 'mongo_client'):
-            self.mongo_client.close()
+        """Flush pending work and close all connections"""
+        await self.flush()
+        for task in self._parse_tasks:
+            task.cancel()
+        await asyncio.gather(*self._parse_tasks, return_exceptions=True)
+        self._parse_tasks = []
+        self._parse_queue = None
+        await self.scraper.close()
+        await close_browser_pool()
+        await self.writer.close()
+        if self.exporter:
+            await asyncio.to_thread(self.exporter.close)
+
+def print_reports(mongo_client: MongoDBClient, start_date: str, end_date: str, breakdown: Optional[str] = None,
+                  from_rollups: bool = False, trend: Optional[str] = None) -> None:
+    """Print the price analyses for the scraped date range, computed server-side
+
+    With `from_rollups` the statistics come from the daily price rollups, which
+    count every scrape day's observation of a listing rather than only its
+    latest one. `trend` prints how one checkin date's prices moved across scrape days.
+    """
+    for site, title in (("airbnb", "Airbnb"), ("booking", "Booking")):
+        if from_rollups:
+            analysis = mongo_client.get_rollup_price_analyses(site, start_date, end_date)
+            if not analysis['count']:
+                print(f"No {site} price rollups found.")
+            else:
+                print(f"\n{title} Price Rollups:")
+                print(analysis)
+        else:
+            analyses = mongo_client.get_price_analyses(site, start_date, end_date)
+            if not analyses:
+                print(f"No {site} listings found.")
+            else:
+                print(f"\n{title} Listings Data:")
+                print(analyses[0])
+                if breakdown:
+                    print(f"\n{title} by {breakdown}:")
+                    for analysis in mongo_client.get_price_analyses(site, start_date, end_date, breakdown):
+                        print(analysis)
+
+        if trend:
+            print(f"\n{title} price trend for checkin {trend}:")
+            points = mongo_client.get_price_trend(site, trend)
+            if not points:
+                print("No price rollups for this checkin date.")
+            for point in points:
+                print(point)
+
+def build_jobs(args: argparse.Namespace, ledger: RunLedger) -> List[ScrapeJob]:
+    """Jobs for every site and window in the requested range that is not already fresh"""
+    completed = set() if args.force else ledger.completed_windows(args.start_date, args.end_date)
+
+    jobs = []
+    skipped = 0
+    for search_start_date, search_end_date in iter_date_windows(args.start_date, args.end_date):
+        for site in SITES:
+            if (site, search_start_date, search_end_date) in completed:
+                skipped += 1
+                continue
+            url = URL_BUILDERS[site](search_start_date, search_end_date)
+            jobs.append(ScrapeJob(site, url, search_start_date, search_end_date))
+    if skipped:
+        logger.info(f"Skipping {skipped} windows that are already fresh in the run ledger")
+    return jobs
+
+def enqueue_range(args: argparse.Namespace, mongo_client: MongoDBClient) -> None:
+    """Put the range's jobs in the shared queue for worker processes"""
+    ledger = RunLedger(mongo_client, ttl_hours=args.ttl_hours)
+    job_queue = JobQueue(mongo_client, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    ledger.ensure_indexes()
+    job_queue.ensure_indexes()
+    job_queue.enqueue(build_jobs(args, ledger), reset=args.force)
+    logger.info(f"Queue for {args.start_date} -> {args.end_date}: {job_queue.counts(args.start_date, args.end_date)}")
+
+async def run_worker(args: argparse.Namespace, mongo_client: MongoDBClient) -> None:
+    """Claim and scrape jobs from the shared queue until the range is drained"""
+    exporter = ListingExporter(export_format=args.export_format) if args.export_format != 'none' else None
+    ledger = RunLedger(mongo_client, ttl_hours=args.ttl_hours)
+    job_queue = JobQueue(mongo_client, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    scraper = RentalScraper(concurrency=args.concurrency, mongo_client=mongo_client, exporter=exporter, ledger=ledger,
+                            parse_workers=args.parse_workers)
+    worker = QueueWorker(
+        job_queue,
+        scraper.run_job,
+        slots=args.concurrency * len(SITES),
+        rate_limits={site: args.rate for site in SITES},
+        jitter=tuple(args.jitter),
+        start_date=args.start_date,
+        end_date=args.end_date,
+    )
+
+    try:
+        mongo_client.ensure_indexes()
+        job_queue.ensure_indexes()
+        await worker.run()
+        await scraper.flush()
+        logger.info(f"Queue for {args.start_date} -> {args.end_date}: {job_queue.counts(args.start_date, args.end_date)}")
+    finally:
+        await scraper.close()
+
+async def scrape_range(args: argparse.Namespace, mongo_client: MongoDBClient) -> None:
+    """Scrape every site for every window in the requested date range"""
+    exporter = ListingExporter(export_format=args.export_format) if args.export_format != 'none' else None
+    ledger = RunLedger(mongo_client, ttl_hours=args.ttl_hours)
+    scraper = RentalScraper(concurrency=args.concurrency, mongo_client=mongo_client, exporter=exporter, ledger=ledger,
+                            parse_workers=args.parse_workers)
+    scheduler = DateWindowScheduler(
+        scraper.run_job,
+        concurrency={site: args.concurrency for site in SITES},
+        rate_limits={site: args.rate for site in SITES},
+        jitter=tuple(args.jitter),
+        max_retries=args.retries,
+    )
+
+    try:
+        mongo_client.ensure_indexes()
+        ledger.ensure_indexes()
+        ledger.start_run(args.start_date, args.end_date, resume=args.resume)
+        for job in build_jobs(args, ledger):
+            scheduler.add_job(job)
+
+        jobs = await scheduler.run()
+        # Pending parses and writes must land before the run can be marked completed
+        await scraper.flush()
+        ledger.finish_run(
+            jobs_done=sum(1 for job in jobs if job.status == "done"),
+            jobs_failed=sum(1 for job in jobs if job.status != "done"),
+        )
+
+        vision_cache = get_vision_cache()
+        if vision_cache:
+            logger.info(f"Vision cache: {vision_cache.stats()}")
+        limiter = get_gemini_limiter()
+        if limiter.successes or limiter.throttled:
+            logger.info(f"Gemini limiter: {limiter.stats()}")
+    finally:
+        await scraper.close()
+
+def print_run_metrics() -> None:
+    """Print the per-stage summary of this run and write the Prometheus textfile"""
+    metrics = get_metrics()
+    try:
+        if metrics.durations:
+            print(f"\nRun metrics ({metrics.run_id}):")
+            print(metrics.summary_table())
+            logger.info(f"Metrics written to {metrics.write_prometheus()}")
+    finally:
+        close_metrics()
 
 async def main() -> None:
     parser = argparse.ArgumentParser(description='Scrape rental listings')
     parser.add_argument('start_date', type=str, help='Start date in YYYY-MM-DD format')
     parser.add_argument('end_date', type=str, help='End date in YYYY-MM-DD format')
+    parser.add_argument('--concurrency', type=int, default=2, help='Windows scraped at once per site')
+    parser.add_argument('--parse-workers', type=int, default=2,
+                        help='Captured pages parsed at once (Vision calls overlap with the next captures)')
+    parser.add_argument('--rate', type=float, default=0.2, help='Job starts per second per site')
+    parser.add_argument('--jitter', type=float, nargs=2, default=(1.0, 4.0), metavar=('MIN', 'MAX'),
+                        help='Random delay range in seconds before each job')
+    parser.add_argument('--retries', type=int, default=1, help='Extra attempts for a failed window')
+    parser.add_argument('--ttl-hours', type=float, default=12,
+                        help='Skip windows scraped successfully within this many hours')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume the last interrupted run for this range from its checkpoint')
+    parser.add_argument('--force', action='store_true', help='Scrape every window, ignoring the run ledger')
+    parser.add_argument('--enqueue', action='store_true',
+                        help='Add the range to the shared MongoDB job queue for --worker processes and exit')
+    parser.add_argument('--worker', action='store_true',
+                        help='Claim and scrape queued jobs in the range until none are left')
+    parser.add_argument('--lease-seconds', type=float, default=300,
+                        help='How long a worker holds a claimed job without a heartbeat')
+    parser.add_argument('--max-attempts', type=int, default=3, help='Claims per queued job before it is failed')
+    parser.add_argument('--report-only', action='store_true', help='Skip scraping and only print the reports')
+    parser.add_argument('--export-format', choices=EXPORT_FORMATS + ('none',), default='ndjson',
+                        help='File format for the partitioned listings export')
+    parser.add_argument('--export-only', action='store_true',
+                        help='Export the listings already in MongoDB for the date range and exit')
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help='Restore missing daily price rollups from the stored listings and exit')
+    parser.add_argument('--migrate-listings', action='store_true',
+                        help='Key stored listings, move repeated scrapes to <site>_history, build the unique index and exit')
+    parser.add_argument('--breakdown', choices=['checkin', 'property'], help='Also report prices per checkin date or per property')
+    parser.add_argument('--from-rollups', action='store_true',
+                        help='Report prices from the daily price rollups instead of the stored listings')
+    parser.add_argument('--trend', metavar='CHECKIN', help='Also report how prices for this checkin date moved across scrape days')
     args = parser.parse_args()
 
-    scraper = RentalScraper()
-    
+    # One lazily connected client shared by the scraper and the reports
+    mongo_client = get_mongo_client()
     try:
-        start_date = args.start_date
-        end_date = args.end_date
-        
-        current_date = datetime.strptime(start_date, "%Y-%m-%d")
-        end_date = datetime.strptime(end_date, "%Y-%m-%d")
-        
-        while current_date <= end_date:
-            search_start_date = current_date.strftime("%Y-%m-%d")
-            search_end_date = (current_date + timedelta(days=1)).strftime("%Y-%m-%d")
-            
-            current_date += timedelta(days=1)
-        
-            # Construct the URLs
-            airbnb_url = f'https://www.airbnb.com/s/Ger%C3%AAs--Portugal/homes?refinement_paths%5B%5D=%2Fhomes&flexible_trip_lengths%5B%5D=one_week&monthly_start_date=2025-02-01&monthly_length=3&monthly_end_date=2025-05-01&price_filter_input_type=0&channel=EXPLORE&query=Ger%C3%AAs&date_picker_type=calendar&checkin={search_start_date}&checkout={search_end_date}&source=structured_search_input_header&search_type=autocomplete_click&price_filter_num_nights=1&room_types%5B%5D=Entire%20home%2Fapt&selected_filter_order%5B%5D=room_types%3AEntire%20home%2Fapt&selected_filter_order%5B%5D=l2_property_type_ids%3A1&update_selected_filters=true&zoom_level=10&l2_property_type_ids%5B%5D=1&place_id=ChIJXTwMUMIYJQ0RMAqBT8DrAAo&location_bb=Qibr%2B8ECku1CJuk4wQKd%2Bg%3D%3D'
-            booking_url = f'https://www.booking.com/searchresults.en-gb.html?label=gen173nr-1BCAEoggI46AdIM1gEaLsBiAEBmAEJuAEZyAEM2AEB6AEBiAIBqAIDuAKMk5C8BsACAdICJGM2MDZhYjU5LTc2OTYtNDliZS1hZTA4LWJlMzVkNTRkMjJkYtgCBeACAQ&sid=6cc99139c41960236eadde3d7b3b1c9a&aid=304142&ss=Geres&ssne=Geres&ssne_untouched=Geres&efdco=1&lang=en-gb&src=index&dest_id=900040488&dest_type=city&checkin={search_start_date}&checkout={search_end_date}&group_adults=2&no_rooms=1&group_children=0&nflt=privacy_type%3D3'
-            # Run both scrapers concurrently
-            await asyncio.gather(
-                scraper.scrape_listings(airbnb_url, search_start_date, search_end_date, scraper.airbnb_scraper),
-                scraper.scrape_listings(booking_url, search_start_date, search_end_date, scraper.booking_scraper)
-            )
-            
-            await asyncio.sleep(10)
-    finally:
-        await scraper.airbnb_scraper.close_browser()
-        await scraper.booking_scraper.close_browser()
-        await scraper.close()
+        if args.export_only:
+            exporter = ListingExporter(export_format=args.export_format if args.export_format != 'none' else 'ndjson')
+            query = {'start_date': {'$gte': args.start_date}, 'end_date': {'$lte': args.end_date}}
+            try:
+                for site in SITES:
+                    exporter.export_collection(mongo_client, site, query)
+            finally:
+                exporter.close()
+            return
 
-    airbnb_listings = MongoDBClient().get_airbnb_listings_by_date_range(args.start_date, args.end_date)
-    if airbnb_listings:
-        print("\nAirbnb Listings Data:")
-        print(calculate_airbnb_price_analyses(airbnb_listings))
-    else:
-        print("No airbnb listings found.")
+        if args.migrate_listings:
+            for site in SITES:
+                mongo_client.migrate_listings(site)
+            return
 
-    booking_listings = MongoDBClient().get_booking_listings_by_date_range(args.start_date, args.end_date)
-    if booking_listings:
-        print("\nBooking Listings Data:")
-        print(calculate_booking_price_analyses(booking_listings))
-    else:
-        print("No booking listings found.")
+        if args.rebuild_rollups:
+            mongo_client.ensure_indexes()
+            for site in SITES:
+                mongo_client.rebuild_price_rollups(site)
+            return
+
+        if args.enqueue:
+            enqueue_range(args, mongo_client)
+            return
+
+        if args.worker:
+            await run_worker(args, mongo_client)
+            return
+
+        if not args.report_only:
+            await scrape_range(args, mongo_client)
+        print_reports(mongo_client, args.start_date, args.end_date, args.breakdown, args.from_rollups, args.trend)
+    finally:
+        close_mongo_client()
+        print_run_metrics()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
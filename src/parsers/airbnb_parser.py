@@ -0,0 +1,313 @@
+from playwright.async_api import Page
+from scrapers.hotels import Listing
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urljoin
+from utils.pagination import set_query_param
+
+import base64
+import binascii
+import json
+import logging
+import re
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Script tags where Airbnb embeds the server-side search state
+STATE_SCRIPT_IDS = ('data-deferred-state-0', 'data-deferred-state', 'data-injector-instances', '__NEXT_DATA__')
+
+STATE_SCRIPT_PATTERN = re.compile(
+    r'<script[^>]*id="(?P<id>%s)"[^>]*>(?P<body>.*?)</script>' % '|'.join(re.escape(i) for i in STATE_SCRIPT_IDS),
+    re.DOTALL
+)
+
+# Card-level fallback when the embedded state cannot be read
+AIRBNB_CARD_SELECTOR = "div[itemprop='itemListElement'], div[data-testid='card-container']"
+
+AIRBNB_FIELD_SELECTORS = {
+    'name': "meta[itemprop='name']",
+    'title': "[data-testid='listing-card-title']",
+    'subtitle': "[data-testid='listing-card-name']",
+    'price': "[data-testid='price-availability-row']",
+    'rating': "span[aria-label*='average rating']",
+    'beds': "[data-testid='listing-card-subtitle']:last-of-type",
+    'link': "a[href*='/rooms/']",
+}
+
+EXTRACT_STATE_SCRIPT = """
+(ids) => ids.map(id => document.getElementById(id)).filter(el => el).map(el => el.textContent)
+"""
+
+EXTRACT_CARDS_SCRIPT = """
+({cardSelector, fields}) => Array.from(document.querySelectorAll(cardSelector)).map(card => {
+    const raw = {};
+    for (const [field, selector] of Object.entries(fields)) {
+        const el = card.querySelector(selector);
+        if (!el) {
+            raw[field] = null;
+        } else if (field === 'link') {
+            raw[field] = el.getAttribute('href');
+        } else {
+            raw[field] = el.getAttribute('content') || el.getAttribute('aria-label') || el.innerText;
+        }
+    }
+    return raw;
+})
+"""
+
+# Numbered page links, used when the page has no embedded page cursors
+EXTRACT_PAGINATION_LINKS_SCRIPT = """
+() => Array.from(document.querySelectorAll("nav[aria-label*='pagination' i] a[href]")).map(a => a.getAttribute('href'))
+"""
+
+PRICE_PATTERN = re.compile(r'(\d[\d.,\s ]*)')
+RATING_PATTERN = re.compile(r'(\d+(?:[.,]\d+)?)')
+
+# '/rooms/12345' or '/rooms/plus/12345' in a listing link
+ROOM_ID_PATTERN = re.compile(r'/rooms/(?:plus/)?(\d+)')
+
+
+def parse_amount(text: Optional[str]) -> Optional[float]:
+    """First amount in a price string such as '€95 night' or '€ 1,234 total'"""
+    if not text:
+        return None
+    match = PRICE_PATTERN.search(text)
+    if not match:
+        return None
+    number = re.sub(r'[\s ]', '', match.group(1)).rstrip('.,')
+    if ',' in number and '.' in number:
+        # Whichever separator comes last is the decimal one: '1,234.50' or '1.234,50'
+        if number.rfind(',') > number.rfind('.'):
+            number = number.replace('.', '').replace(',', '.')
+        else:
+            number = number.replace(',', '')
+    elif re.search(r',\d{3}$', number):
+        number = number.replace(',', '')
+    else:
+        number = number.replace(',', '.')
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+def parse_rating(text: Optional[str]) -> float:
+    """Score from '4.92 (123)' or '4.92 out of 5 average rating'; 0 for new listings"""
+    if not text:
+        return 0.0
+    match = RATING_PATTERN.search(text)
+    return float(match.group(1).replace(',', '.')) if match else 0.0
+
+
+def _walk(node) -> Iterator[Dict]:
+    """Yield every dict in a JSON tree"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            yield current
+            stack.extend(current.values())
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+
+
+def _get(node, *path):
+    for key in path:
+        if isinstance(node, dict):
+            node = node.get(key)
+        elif isinstance(node, list) and isinstance(key, int) and len(node) > key:
+            node = node[key]
+        else:
+            return None
+    return node
+
+
+def decode_listing_id(value) -> Optional[str]:
+    """Numeric listing id from a plain id or a base64 relay id ('RGVtYW5kU3RheUxpc3Rpbmc6MTIz')"""
+    if value is None or isinstance(value, bool):
+        return None
+    text = str(value).strip()
+    if text.isdigit():
+        return text
+    try:
+        decoded = base64.b64decode(text, validate=True).decode('utf-8')
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    # 'DemandStayListing:123'
+    listing_id = decoded.rsplit(':', 1)[-1]
+    return listing_id if listing_id.isdigit() else None
+
+
+def room_id_from_link(href: Optional[str]) -> Optional[str]:
+    """Listing id from a card link such as '/rooms/12345?check_in=...'"""
+    match = ROOM_ID_PATTERN.search(href or '')
+    return match.group(1) if match else None
+
+
+def _result_id(result: Dict) -> Optional[str]:
+    for value in (
+        _get(result, 'listing', 'id'),
+        _get(result, 'demandStayListing', 'id'),
+        result.get('listingId'),
+        _get(result, 'listing', 'listingId'),
+    ):
+        listing_id = decode_listing_id(value)
+        if listing_id:
+            return listing_id
+    return None
+
+
+def _result_name(result: Dict) -> Optional[str]:
+    listing = result.get('listing') or {}
+    return (
+        _get(result, 'demandStayListing', 'description', 'name', 'localizedStringWithTranslationPreference')
+        or listing.get('name')
+        or result.get('subtitle')
+        or listing.get('title')
+        or result.get('title')
+    )
+
+
+def _result_price(result: Dict) -> Optional[float]:
+    primary = _get(result, 'structuredDisplayPrice', 'primaryLine') or {}
+    for key in ('discountedPrice', 'price', 'accessibilityLabel'):
+        amount = parse_amount(primary.get(key))
+        if amount:
+            return amount
+    return parse_amount(_get(result, 'pricingQuote', 'structuredStayDisplayPrice', 'primaryLine', 'price'))
+
+
+def _result_beds(result: Dict) -> Optional[str]:
+    lines = _get(result, 'listing', 'structuredContent', 'primaryLine') or _get(result, 'structuredContent', 'primaryLine')
+    if isinstance(lines, list):
+        text = ' · '.join(line.get('body') for line in lines if isinstance(line, dict) and line.get('body'))
+        return text or None
+    return None
+
+
+def parse_search_state(state: Dict) -> List[Listing]:
+    """Extract listings from Airbnb's embedded search state
+
+    Every object with a structuredDisplayPrice is a search result; the
+    surrounding fields vary between page versions, so each field is looked up
+    in the known locations.
+    """
+    listings = []
+    seen = set()
+    for node in _walk(state):
+        if 'structuredDisplayPrice' not in node:
+            continue
+        name = _result_name(node)
+        price = _result_price(node)
+        if not name or price is None:
+            continue
+
+        rating_text = node.get('avgRatingLocalized') or _get(node, 'listing', 'avgRatingLocalized')
+        listing_id = _result_id(node)
+        key = listing_id or (name, price)
+        if key in seen:
+            continue
+        seen.add(key)
+        listings.append(Listing(
+            name=name,
+            price=price,
+            rating=parse_rating(rating_text),
+            bed_configuration=_result_beds(node),
+            listing_id=listing_id,
+        ))
+    return listings
+
+
+def _parse_state_texts(texts: List[str]) -> List[Listing]:
+    for text in texts:
+        try:
+            state = json.loads(text)
+        except (json.JSONDecodeError, TypeError):
+            continue
+        listings = parse_search_state(state)
+        if listings:
+            return listings
+    return []
+
+
+def parse_airbnb_html(html: str) -> List[Listing]:
+    """Extract listings from a saved Airbnb search results page"""
+    return _parse_state_texts([match.group('body') for match in STATE_SCRIPT_PATTERN.finditer(html)])
+
+
+def normalise_airbnb_card(raw: Dict[str, Optional[str]]) -> Optional[Listing]:
+    """Turn the raw text of a result card into a Listing, None if it has no name or price"""
+    name = raw.get('name') or raw.get('subtitle') or raw.get('title')
+    price = parse_amount(raw.get('price'))
+    if not name or price is None:
+        return None
+    return Listing(
+        name=name.strip(),
+        price=price,
+        rating=parse_rating(raw.get('rating')),
+        bed_configuration=(raw.get('beds') or '').strip() or None,
+        listing_id=room_id_from_link(raw.get('link')),
+    )
+
+
+async def parse_airbnb_page(page: Page) -> List[Listing]:
+    """Extract listings from a live Airbnb page without the Vision model
+
+    The embedded search state is tried first, then the rendered result cards.
+
+    Returns:
+        List[Listing]: Listings found, empty if neither source could be read
+    """
+    texts = await page.evaluate(EXTRACT_STATE_SCRIPT, list(STATE_SCRIPT_IDS))
+    listings = _parse_state_texts(texts)
+    if listings:
+        logger.info(f"Extracted {len(listings)} Airbnb listings from the embedded page data")
+        return listings
+
+    raw_cards = await page.evaluate(
+        EXTRACT_CARDS_SCRIPT,
+        {'cardSelector': AIRBNB_CARD_SELECTOR, 'fields': AIRBNB_FIELD_SELECTORS},
+    )
+    listings = [listing for listing in map(normalise_airbnb_card, raw_cards) if listing]
+    if listings:
+        logger.info(f"Extracted {len(listings)} Airbnb listings from the result cards")
+    return listings
+
+
+def parse_page_cursors(state: Dict) -> List[str]:
+    """Cursors of every result page from the embedded search state, first page included"""
+    for node in _walk(state):
+        cursors = node.get('pageCursors')
+        if isinstance(cursors, list) and cursors and all(isinstance(c, str) for c in cursors):
+            return cursors
+    return []
+
+
+async def airbnb_page_urls(page: Page, url: str, max_pages: int = 15) -> List[str]:
+    """URLs of the result pages after the first one
+
+    The embedded page cursors list every page of the search. Without them,
+    the numbered links in the pagination bar are used.
+
+    Returns:
+        List[str]: One URL per further page, in order
+    """
+    cursors = []
+    for text in await page.evaluate(EXTRACT_STATE_SCRIPT, list(STATE_SCRIPT_IDS)):
+        try:
+            cursors = parse_page_cursors(json.loads(text))
+        except (json.JSONDecodeError, TypeError):
+            continue
+        if cursors:
+            break
+
+    if cursors:
+        urls = [set_query_param(url, 'cursor', cursor) for cursor in cursors[1:]]
+    else:
+        urls = []
+        for href in await page.evaluate(EXTRACT_PAGINATION_LINKS_SCRIPT):
+            absolute = urljoin(url, href)
+            if absolute != url and absolute not in urls:
+                urls.append(absolute)
+    return urls[:max(0, max_pages - 1)]
@@ -0,0 +1,188 @@
+from playwright.async_api import Page
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+from utils.pagination import set_query_param
+
+import logging
+import re
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# CSS selector for one search result card
+BOOKING_CARD_SELECTOR = "div[data-testid='property-card']"
+
+# Field name -> selector relative to the card. Only the inner text is read.
+BOOKING_FIELD_SELECTORS = {
+    'name': "div[data-testid='title']",
+    'price': "span[data-testid='price-and-discounted-price']",
+    'rating': "div[data-testid='review-score']",
+    'bed_configuration': "div[data-testid='recommended-units']",
+    'link': "a[data-testid='title-link']",
+}
+
+# '/hotel/pt/casa-do-geres.en-gb.html' in a card's title link: country and property slug
+HOTEL_PATH_PATTERN = re.compile(r'/hotel/([a-z]{2}/[^./?#]+)')
+
+# Results per page; further pages are requested with the `offset` query parameter
+BOOKING_PAGE_SIZE = 25
+
+# Layouts without numbered pages grow the list with this button instead
+BOOKING_LOAD_MORE_SELECTOR = "button:has-text('Load more results')"
+
+# Shown instead of the cards when the search has no results
+BOOKING_NO_RESULTS_SELECTOR = "[data-testid='no-results-message']"
+
+# "Gerês: 143 properties found" in the results header
+RESULT_COUNT_PATTERN = re.compile(r'([\d.,]+)\s+propert(?:y|ies)\s+found', re.IGNORECASE)
+
+# An amount with its currency symbol, e.g. '€ 1,234', 'US$89.50' or '95 €'. A leading '+'
+# marks an extra such as '+€ 10 taxes and charges', which is not the price itself.
+CURRENCY_SYMBOLS = r"(?:€|EUR|US\$|\$|£|GBP)"
+PRICE_AMOUNT_PATTERN = re.compile(
+    rf"(?P<extra>\+\s*)?{CURRENCY_SYMBOLS}\s*(?P<prefixed>\d[\d.,]*)|(?P<suffixed>\d[\d.,]*)\s*{CURRENCY_SYMBOLS}"
+)
+
+RESULT_HEADER_SCRIPT = "() => Array.from(document.querySelectorAll('h1')).map(h => h.innerText).join('\\n')"
+
+# Runs in the page and returns the raw text of every field for every card
+EXTRACT_CARDS_SCRIPT = """
+({cardSelector, fields}) => Array.from(document.querySelectorAll(cardSelector)).map(card => {
+    const raw = {};
+    for (const [field, selector] of Object.entries(fields)) {
+        const el = card.querySelector(selector);
+        raw[field] = el ? (field === 'link' ? el.getAttribute('href') : el.innerText) : null;
+    }
+    return raw;
+})
+"""
+
+
+async def extract_booking_cards(page: Page) -> List[Dict[str, Optional[str]]]:
+    """Read the raw text of every property card in a single round trip
+
+    Args:
+        page (Page): Page showing Booking search results
+
+    Returns:
+        List[Dict[str, Optional[str]]]: One dict per card, None for missing fields
+    """
+    return await page.evaluate(
+        EXTRACT_CARDS_SCRIPT,
+        {'cardSelector': BOOKING_CARD_SELECTOR, 'fields': BOOKING_FIELD_SELECTORS},
+    )
+
+
+def parse_price(price_text: Optional[str]) -> Union[float, str]:
+    """Convert a Booking price such as '€ 1,234' or '€\xa089' to a float, 'N/A' if missing
+
+    Only amounts next to a currency symbol count, so '1 night' is never read as
+    a price and '+€ 10 taxes and charges' is skipped. A discounted card shows
+    the original and the current price ('€\xa0120\n€\xa095'); the current one
+    comes last.
+    """
+    if not price_text:
+        return "N/A"
+
+    amounts = [
+        match.group('prefixed') or match.group('suffixed')
+        for match in PRICE_AMOUNT_PATTERN.finditer(price_text)
+        if not match.group('extra')
+    ]
+    if not amounts:
+        logger.warning(f"Could not parse price: {price_text!r}")
+        return "N/A"
+
+    number = amounts[-1].rstrip(".,")
+    if "," in number and "." in number:
+        # Whichever separator comes last is the decimal one: '1,234.50' or '1.234,50'
+        if number.rfind(",") > number.rfind("."):
+            number = number.replace(".", "").replace(",", ".")
+        else:
+            number = number.replace(",", "")
+    elif re.search(r",\d{3}$", number):
+        # en-gb pages use a comma as the thousands separator
+        number = number.replace(",", "")
+    else:
+        number = number.replace(",", ".")
+
+    try:
+        return float(number)
+    except ValueError:
+        logger.warning(f"Could not parse price: {price_text!r}")
+        return "N/A"
+
+
+def parse_rating(rating_text: Optional[str]) -> str:
+    """Pick the score out of the review block ('Scored 8.6\\n8.6\\nFabulous...')"""
+    if not rating_text:
+        return "N/A"
+    lines = [line.strip() for line in rating_text.split('\n') if line.strip()]
+    if len(lines) > 1:
+        return lines[1]
+    return lines[0] if lines else "N/A"
+
+
+def hotel_id_from_link(href: Optional[str]) -> Optional[str]:
+    """Property id ('pt/casa-do-geres') from a card's title link, None if it has no hotel path"""
+    match = HOTEL_PATH_PATTERN.search(href or '')
+    return match.group(1) if match else None
+
+
+def normalise_booking_card(raw: Dict[str, Optional[str]], url: str, start_date: str, end_date: str) -> Dict:
+    """Turn the raw card text into a listing document"""
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'url': url,
+        'start_date': start_date,
+        'end_date': end_date,
+        'name': raw.get('name') or "N/A",
+        'price': parse_price(raw.get('price')),
+        'rating': parse_rating(raw.get('rating')),
+        'bed_configuration': raw.get('bed_configuration') or "N/A",
+        'listing_id': hotel_id_from_link(raw.get('link')),
+    }
+
+
+async def parse_booking_page(page: Page, url: str, start_date: str, end_date: str) -> List[Dict]:
+    """Extract and normalise every Booking listing on the page"""
+    raw_cards = await extract_booking_cards(page)
+    logger.info(f"Found {len(raw_cards)} hotels")
+    return [normalise_booking_card(raw, url, start_date, end_date) for raw in raw_cards]
+
+
+def parse_result_count(header_text: Optional[str]) -> Optional[int]:
+    """Total number of results from the search header, None if it is not shown"""
+    match = RESULT_COUNT_PATTERN.search(header_text or "")
+    if not match:
+        return None
+    return int(re.sub(r"[.,]", "", match.group(1)))
+
+
+async def booking_result_count(page: Page) -> Optional[int]:
+    """Total number of results for the search shown on the page"""
+    return parse_result_count(await page.evaluate(RESULT_HEADER_SCRIPT))
+
+
+async def booking_has_no_results(page: Page) -> bool:
+    """Whether the page says the search found nothing, as opposed to cards that failed to load"""
+    if await page.query_selector(BOOKING_NO_RESULTS_SELECTOR) is not None:
+        return True
+    return await booking_result_count(page) == 0
+
+
+def booking_page_urls(url: str, total: int, page_size: int = BOOKING_PAGE_SIZE, max_pages: int = 15) -> List[str]:
+    """URLs of the result pages after the first one
+
+    Args:
+        url (str): Search URL of the first page
+        total (int): Total number of results for the search
+        page_size (int): Results per page
+        max_pages (int): Maximum number of pages including the first one
+
+    Returns:
+        List[str]: One URL per further page, in order
+    """
+    offsets = range(page_size, total, page_size)
+    return [set_query_param(url, 'offset', offset) for offset in offsets][:max(0, max_pages - 1)]
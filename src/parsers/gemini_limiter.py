@@ -0,0 +1,209 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from utils.metrics import get_metrics
+from utils.scheduler import TokenBucket
+
+import asyncio
+import logging
+import os
+import re
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Error classes returned by classify_error
+QUOTA = 'quota'
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+
+TRANSIENT_STATUS_CODES = {408, 500, 502, 503, 504}
+QUOTA_MARKERS = ('RESOURCE_EXHAUSTED', 'rate limit', 'quota')
+TRANSIENT_MARKERS = ('timeout', 'timed out', 'temporarily', 'connection', 'UNAVAILABLE', 'DEADLINE_EXCEEDED')
+
+# 'retryDelay': '17s' in a 429 body, or a Retry-After header value
+RETRY_DELAY_PATTERN = re.compile(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", re.IGNORECASE)
+RETRY_AFTER_PATTERN = re.compile(r"retry-after['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    for attribute in ('code', 'status_code', 'status'):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, 'response', None)
+    value = getattr(response, 'status_code', None)
+    return value if isinstance(value, int) else None
+
+
+def classify_error(error: Exception) -> str:
+    """Whether a Gemini error is a quota rejection, a transient failure or permanent"""
+    code = _status_code(error)
+    text = str(error)
+    if code == 429 or any(marker.lower() in text.lower() for marker in QUOTA_MARKERS):
+        return QUOTA
+    if code in TRANSIENT_STATUS_CODES or isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return TRANSIENT
+    if code is None and any(marker.lower() in text.lower() for marker in TRANSIENT_MARKERS):
+        return TRANSIENT
+    return PERMANENT
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the API asked us to wait before retrying, if it said"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers:
+        value = headers.get('retry-after')
+        try:
+            if value is not None:
+                return float(value)
+        except (TypeError, ValueError):
+            pass
+    text = str(error)
+    match = RETRY_DELAY_PATTERN.search(text) or RETRY_AFTER_PATTERN.search(text)
+    return float(match.group(1)) if match else None
+
+
+class GeminiLimiter:
+    """Client-side budget and adaptive concurrency for Gemini calls
+
+    Every call waits for a request from the requests-per-minute bucket and its
+    estimated tokens from the tokens-per-minute bucket, then for a free
+    concurrency slot. The number of slots adapts AIMD-style: it is halved on
+    a quota rejection and grows by one after a full window of successes, so
+    throughput settles just under the quota. A rejection that carries a
+    retry-after hint pauses every caller until it has passed.
+    """
+
+    def __init__(self, rpm: float = 10, tpm: float = 1_000_000, max_concurrency: int = 2,
+                 min_concurrency: int = 1, backoff_factor: float = 0.5, default_pause: float = 10.0):
+        """
+        Args:
+            rpm (float): Requests allowed per minute
+            tpm (float): Tokens allowed per minute
+            max_concurrency (int): Ceiling for calls in flight at once
+            min_concurrency (int): Floor the concurrency never drops below
+            backoff_factor (float): Multiplier applied to the concurrency on a quota rejection
+            default_pause (float): Seconds to pause on a quota rejection without a retry-after hint
+        """
+        self.requests = TokenBucket(rpm / 60, capacity=max(1, int(rpm / 60 * 10)))
+        self.tokens = TokenBucket(tpm / 60, capacity=max(1, int(tpm / 6)))
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.backoff_factor = backoff_factor
+        self.default_pause = default_pause
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.throttled = 0
+        self.successes = 0
+        self.paused_until = 0.0
+        self._successes_in_window = 0
+        self._last_backoff = 0.0
+        self._condition: Optional[asyncio.Condition] = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def _wait_for_pause(self) -> None:
+        delay = self.paused_until - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self.paused_until - time.monotonic()
+
+    async def _acquire(self, tokens: float) -> None:
+        await self._wait_for_pause()
+        await self.requests.acquire()
+        await self.tokens.acquire(min(tokens, self.tokens.capacity))
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        # A rejection may have paused callers while this one waited for a slot
+        await self._wait_for_pause()
+
+    async def _release(self) -> None:
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    def _on_success(self) -> None:
+        self.successes += 1
+        self._successes_in_window += 1
+        if self._successes_in_window >= int(self.limit) and self.limit < self.max_concurrency:
+            self.limit = min(self.max_concurrency, self.limit + 1)
+            self._successes_in_window = 0
+            logger.info(f"Gemini concurrency raised to {int(self.limit)}")
+
+    def _on_throttled(self, error: Exception) -> None:
+        self.throttled += 1
+        get_metrics().increment('vision_throttled')
+        now = time.monotonic()
+        pause = retry_after(error) or self.default_pause
+        self.paused_until = max(self.paused_until, now + pause)
+
+        # Calls already in flight fail together; that is one congestion signal, not several
+        if now - self._last_backoff > pause:
+            self.limit = max(self.min_concurrency, self.limit * self.backoff_factor)
+            self._last_backoff = now
+            logger.warning(f"Gemini quota exceeded, concurrency lowered to {int(self.limit)}, pausing {pause:.1f}s")
+        self._successes_in_window = 0
+
+    @asynccontextmanager
+    async def request(self, tokens: float = 0) -> AsyncIterator[None]:
+        """Hold a budgeted slot for one Gemini call
+
+        A quota error raised inside the block lowers the concurrency and pauses
+        callers; a clean exit counts towards raising it again.
+        """
+        self.waiting += 1
+        started = time.monotonic()
+        try:
+            await self._acquire(tokens)
+        finally:
+            self.waiting -= 1
+        get_metrics().observe('vision_queue_wait_seconds', time.monotonic() - started)
+
+        try:
+            yield
+        except Exception as e:
+            if classify_error(e) == QUOTA:
+                self._on_throttled(e)
+            raise
+        else:
+            self._on_success()
+        finally:
+            await self._release()
+
+    def stats(self) -> Dict:
+        return {
+            'concurrency_limit': int(self.limit),
+            'in_flight': self.in_flight,
+            'queue_depth': self.waiting,
+            'throttled': self.throttled,
+            'successes': self.successes,
+            'paused_for': round(max(0.0, self.paused_until - time.monotonic()), 1),
+        }
+
+
+_limiter: Optional[GeminiLimiter] = None
+
+
+def get_gemini_limiter() -> GeminiLimiter:
+    """Get the process-wide Gemini limiter, creating it on first use
+
+    Configured by GEMINI_RPM, GEMINI_TPM and VISION_MAX_CONCURRENCY.
+    """
+    global _limiter
+    if _limiter is None:
+        _limiter = GeminiLimiter(
+            rpm=float(os.getenv('GEMINI_RPM', '10')),
+            tpm=float(os.getenv('GEMINI_TPM', '1000000')),
+            max_concurrency=int(os.getenv('VISION_MAX_CONCURRENCY', '2')),
+        )
+    return _limiter
@@ -0,0 +1,143 @@
+from typing import Dict, List, Optional
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = "data/vision_cache.sqlite3"
+
+
+class VisionCache:
+    """Content-addressed SQLite cache for Vision parse results
+
+    Entries are keyed by the image hash plus the model name and prompt version,
+    so a pixel-identical screenshot parsed with the same prompt never goes back
+    to Gemini. Old entries are evicted by age and the table is capped by size.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = 5000, max_age_days: float = 30):
+        """
+        Args:
+            path (str): SQLite database file
+            max_entries (int): Maximum number of cached results kept
+            max_age_days (float): Entries older than this are evicted
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS vision_results (
+                key TEXT PRIMARY KEY,
+                listings TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_vision_results_last_used ON vision_results (last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(image_bytes: bytes, model: str, prompt_version: str) -> str:
+        """Build the cache key for an image parsed with a given model and prompt"""
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        return f"{digest}:{model}:{prompt_version}"
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """Return the cached listings for a key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT listings, created_at FROM vision_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE vision_results SET last_used = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, listings: List[Dict]) -> None:
+        """Store the listings parsed for a key"""
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO vision_results (key, listings, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(listings), now, now)
+            )
+            self.conn.commit()
+            self._writes += 1
+            evict = self._writes % 100 == 1
+        if evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries and the least recently used ones above max_entries
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self._lock:
+            removed = self.conn.execute(
+                "DELETE FROM vision_results WHERE created_at < ?", (time.time() - self.max_age,)
+            ).rowcount
+            removed += self.conn.execute("""
+                DELETE FROM vision_results WHERE key IN (
+                    SELECT key FROM vision_results ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,)).rowcount
+            self.conn.commit()
+        if removed:
+            logger.info(f"Evicted {removed} vision cache entries")
+        return removed
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM vision_results").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+            'entries': size,
+        }
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self.conn.close()
+
+
+_vision_cache: Optional[VisionCache] = None
+
+
+def get_vision_cache() -> Optional[VisionCache]:
+    """Get the process-wide cache, or None when VISION_CACHE_ENABLED is off"""
+    global _vision_cache
+    if os.getenv('VISION_CACHE_ENABLED', '1').lower() in ('0', 'false', 'no'):
+        return None
+    if _vision_cache is None:
+        _vision_cache = VisionCache(
+            path=os.getenv('VISION_CACHE_PATH', DEFAULT_CACHE_PATH),
+            max_entries=int(os.getenv('VISION_CACHE_MAX_ENTRIES', '5000')),
+            max_age_days=float(os.getenv('VISION_CACHE_MAX_AGE_DAYS', '30')),
+        )
+    return _vision_cache
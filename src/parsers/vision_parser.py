@@ -2,8 +2,16 @@ from google import genai
 from google.genai import types
 from dotenv import load_dotenv
 from scrapers.hotels import Listing
-from typing import List
+from parsers.vision_cache import VisionCache, get_vision_cache
+from parsers.gemini_limiter import PERMANENT, QUOTA, TRANSIENT, classify_error, get_gemini_limiter, retry_after
+from PIL import Image
+from utils.metrics import get_metrics
+from typing import Dict, List, Optional, Union
 
+import asyncio
+import hashlib
+import io
+import math
 import os
 import json
 import logging
@@ -15,13 +23,9 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-def parse_listing_screenshot(image_path) -> List[Listing]:
-    """Parse the screenshot using Vision AI"""
-    try:
-        client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
-        
-        # Prepare the prompt
-        prompt = """
+MODEL_NAME = 'gemini-2.0-flash-exp'
+
+PROMPT = """
         Analyze this Airbnb listing screenshot and extract ONLY the following information in JSON format for each listing on the image:
         - name: The listing title/name (required)
         - price: The price per night as a number only, no currency symbols (required)
@@ -47,71 +51,216 @@ def parse_listing_screenshot(image_path) -> List[Listing]:
         Return ONLY the JSON array. If bed_configuration is not found for a listing, omit it from that listing's object.
         """
 
-        # Read image file
-        with open(image_path, 'rb') as f:
-            image_bytes = f.read()
-
-        # Implement exponential backoff retry logic
-        base_delay = 5  # Start with 5 seconds delay
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                logger.info(f"Attempt {attempt + 1}/{max_retries} to analyze image")
-                response = client.models.generate_content(
-                    model='gemini-2.0-flash-exp',
-                    contents=[
-                        prompt,
-                        types.Part.from_bytes(
-                            data=image_bytes,
-                            mime_type='image/png'
-                        )
-                    ],
-                    config=types.GenerateContentConfig(
-                        response_mime_type='application/json',
-                        response_schema=Listing.get_json_schema()
-                    )
-                )
-                
-                # Process the response
-                if response.text:
-                    # Clean up the response text to ensure valid JSON
-                    json_text = response.text.strip()
-                    if not json_text.startswith('['):
-                        json_start = json_text.find('[')
-                        if json_start != -1:
-                            json_text = json_text[json_start:]
-                    if not json_text.endswith(']'):
-                        json_end = json_text.rfind(']')
-                        if json_end != -1:
-                            json_text = json_text[:json_end+1]
-                    
-                    # Parse JSON and validate with Pydantic model
-                    try:
-                        data = json.loads(json_text)
-                        listings = [Listing.model_validate(item) for item in data]
-                        logger.info(f"Successfully parsed {len(listings)} listings")
-                        return listings
-                    except json.JSONDecodeError as e:
-                        logger.error(f"Failed to parse JSON: {e}")
-                        logger.debug(f"Raw JSON text: {json_text}")
-                    except Exception as e:
-                        logger.error(f"Failed to validate listing data: {e}")
-                
-                return []
-            
-            except Exception as e:
-                delay = base_delay * (2 ** attempt)  # Exponential backoff
-                if attempt < max_retries - 1:  # Don't wait after the last attempt
-                    logger.warning(f"Attempt {attempt + 1} failed: {str(e)}. Retrying in {delay} seconds...")
-                    time.sleep(delay)
-                else:
-                    logger.error(f"All attempts failed. Last error: {str(e)}")
-                    raise
-        
+# Cache key component; changes whenever the prompt or response schema changes
+PROMPT_VERSION = hashlib.sha256(
+    (PROMPT + json.dumps(Listing.get_json_schema(), sort_keys=True)).encode()
+).hexdigest()[:12]
+
+# Exponential backoff settings for transient errors
+BASE_DELAY = 5
+MAX_RETRIES = 3
+
+# Quota rejections are waited out through the limiter instead of dropping the screenshot
+MAX_QUOTA_RETRIES = int(os.getenv('VISION_MAX_QUOTA_RETRIES', '8'))
+
+# Token estimate: Gemini bills an image as 258 tokens per 768x768 tile, plus the prompt and the reply
+IMAGE_TILE_SIZE = 768
+TOKENS_PER_TILE = 258
+RESPONSE_TOKEN_BUDGET = 1000
+
+_client = None
+
+def get_client() -> genai.Client:
+    """Get the shared Gemini client, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
+    return _client
+
+def estimate_tokens(image_bytes: bytes) -> int:
+    """Rough token cost of one parse, used to budget against the tokens-per-minute quota"""
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            width, height = img.size
+        tiles = math.ceil(width / IMAGE_TILE_SIZE) * math.ceil(height / IMAGE_TILE_SIZE)
+    except Exception:
+        tiles = 4
+    return tiles * TOKENS_PER_TILE + len(PROMPT) // 4 + RESPONSE_TOKEN_BUDGET
+
+def _record_usage(response) -> None:
+    usage = getattr(response, 'usage_metadata', None)
+    total = getattr(usage, 'total_token_count', None)
+    if total:
+        get_metrics().observe('vision_tokens', total)
+
+def _read_image(image: Union[bytes, str]) -> bytes:
+    """Accept either raw image bytes or a path to an image file"""
+    if isinstance(image, (bytes, bytearray)):
+        return bytes(image)
+    with open(image, 'rb') as f:
+        return f.read()
+
+def _build_request(image_bytes: bytes) -> Dict:
+    return {
+        'model': MODEL_NAME,
+        'contents': [
+            PROMPT,
+            types.Part.from_bytes(
+                data=image_bytes,
+                mime_type='image/png'
+            )
+        ],
+        'config': types.GenerateContentConfig(
+            response_mime_type='application/json',
+            response_schema=Listing.get_json_schema()
+        ),
+    }
+
+def _cache_key(image_bytes: bytes) -> str:
+    return VisionCache.make_key(image_bytes, MODEL_NAME, PROMPT_VERSION)
+
+def _cache_lookup(image_bytes: bytes) -> Optional[List[Listing]]:
+    cache = get_vision_cache()
+    if cache is None:
+        return None
+    cached = cache.get(_cache_key(image_bytes))
+    if cached is None:
+        return None
+    logger.info(f"Vision cache hit ({len(cached)} listings)")
+    return [Listing.model_validate(item) for item in cached]
+
+def _cache_store(image_bytes: bytes, listings: List[Listing]) -> None:
+    cache = get_vision_cache()
+    # Empty results are usually a bad response, so they are not worth keeping
+    if cache is not None and listings:
+        cache.set(_cache_key(image_bytes), [listing.model_dump() for listing in listings])
+
+def _parse_response_text(text: Optional[str]) -> List[Listing]:
+    """Turn the raw model output into validated listings"""
+    if not text:
         return []
+
+    # Clean up the response text to ensure valid JSON
+    json_text = text.strip()
+    if not json_text.startswith('['):
+        json_start = json_text.find('[')
+        if json_start != -1:
+            json_text = json_text[json_start:]
+    if not json_text.endswith(']'):
+        json_end = json_text.rfind(']')
+        if json_end != -1:
+            json_text = json_text[:json_end+1]
+    
+    # Parse JSON and validate with Pydantic model
+    try:
+        data = json.loads(json_text)
+        listings = [Listing.model_validate(item) for item in data]
+        logger.info(f"Successfully parsed {len(listings)} listings")
+        return listings
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse JSON: {e}")
+        logger.debug(f"Raw JSON text: {json_text}")
     except Exception as e:
-        logger.error(f"Error processing image: {e}")
-        return []
+        logger.error(f"Failed to validate listing data: {e}")
+    return []
+
+def parse_listing_screenshot(image: Union[bytes, str]) -> List[Listing]:
+    """Parse the screenshot (PNG bytes or file path) using Vision AI"""
+    with get_metrics().span('vision_parse'):
+        try:
+            client = get_client()
+            image_bytes = _read_image(image)
+
+            cached = _cache_lookup(image_bytes)
+            if cached is not None:
+                return cached
+
+            # Implement exponential backoff retry logic
+            for attempt in range(MAX_RETRIES):
+                try:
+                    logger.info(f"Attempt {attempt + 1}/{MAX_RETRIES} to analyze image")
+                    response = client.models.generate_content(**_build_request(image_bytes))
+                    listings = _parse_response_text(response.text)
+                    _cache_store(image_bytes, listings)
+                    return listings
+            
+                except Exception as e:
+                    kind = classify_error(e)
+                    # Honour the API's retry hint, else back off exponentially
+                    delay = retry_after(e) or BASE_DELAY * (2 ** attempt)
+                    if kind != PERMANENT and attempt < MAX_RETRIES - 1:  # Don't wait after the last attempt
+                        get_metrics().increment('vision_retries', reason=kind)
+                        logger.warning(f"Attempt {attempt + 1} failed ({kind}): {str(e)}. Retrying in {delay} seconds...")
+                        time.sleep(delay)
+                    else:
+                        logger.error(f"All attempts failed. Last error: {str(e)}")
+                        raise
+        
+            return []
+        except Exception as e:
+            get_metrics().increment('vision_failures')
+            logger.error(f"Error processing image: {e}")
+            return []
+
+async def parse_listing_screenshot_async(image: Union[bytes, str]) -> List[Listing]:
+    """Parse the screenshot (PNG bytes or file path) using Vision AI without blocking the event loop
+
+    Calls go through the shared GeminiLimiter, which keeps them within the
+    request and token budgets and adapts how many are in flight. Quota
+    rejections are waited out; transient errors are retried with backoff.
+
+    Raises:
+        Exception: The last Gemini error once the retries are used up or the error
+                   is permanent, so the window fails instead of looking empty
+    """
+    with get_metrics().span('vision_parse'):
+        try:
+            client = get_client()
+            if isinstance(image, (bytes, bytearray)):
+                image_bytes = bytes(image)
+            else:
+                image_bytes = await asyncio.to_thread(_read_image, image)
+
+            cached = await asyncio.to_thread(_cache_lookup, image_bytes)
+            if cached is not None:
+                return cached
+
+            limiter = get_gemini_limiter()
+            tokens = estimate_tokens(image_bytes)
+            quota_failures = 0
+            transient_failures = 0
+            while True:
+                try:
+                    logger.info(f"Analyzing image ({tokens} estimated tokens, limiter {limiter.stats()})")
+                    async with limiter.request(tokens):
+                        response = await client.aio.models.generate_content(**_build_request(image_bytes))
+                    _record_usage(response)
+                    listings = _parse_response_text(response.text)
+                    await asyncio.to_thread(_cache_store, image_bytes, listings)
+                    return listings
+
+                except Exception as e:
+                    kind = classify_error(e)
+                    if kind == QUOTA and quota_failures < MAX_QUOTA_RETRIES:
+                        # The limiter has lowered its concurrency and pauses until the retry hint
+                        quota_failures += 1
+                        get_metrics().increment('vision_retries', reason=kind)
+                        logger.warning(f"Gemini quota exceeded ({quota_failures}/{MAX_QUOTA_RETRIES}), "
+                                       f"waiting for the limiter: {str(e)}")
+                        continue
+                    if kind == TRANSIENT and transient_failures < MAX_RETRIES - 1:
+                        delay = retry_after(e) or BASE_DELAY * (2 ** transient_failures)  # Exponential backoff
+                        transient_failures += 1
+                        get_metrics().increment('vision_retries', reason=kind)
+                        logger.warning(f"Transient Gemini error: {str(e)}. Retrying in {delay} seconds...")
+                        await asyncio.sleep(delay)
+                        continue
+                    logger.error(f"Giving up on image after {kind} error: {str(e)}")
+                    raise
+        except Exception as e:
+            get_metrics().increment('vision_failures')
+            logger.error(f"Error processing image: {e}")
+            raise
 
 if __name__ == "__main__":
     # Test the parser with a screenshot
@@ -51,7 +51,7 @@ def get_airbnb_listings_summary(listings: List[Dict]) -> Dict:
     if not listings:
         return {"message": "No listings found"}
     
-    price_analysis = calculate_price_analyses(listings)
+    price_analysis = calculate_airbnb_price_analyses(listings)
     
     # Get unique property names
     unique_properties = set(listing['listing']['name'] for listing in listings)
@@ -5,7 +5,7 @@ def calculate_booking_price_analyses(listings: List[Dict]) -> Dict:
     
     Args:
         listings (List[Dict]): List of listings from Booking, where each listing has
-                             a nested 'listing' object containing the price
+                             a top-level 'price'
     
     Returns:
         Dict: Dictionary containing average, highest, and lowest prices
@@ -19,8 +19,9 @@ def calculate_booking_price_analyses(listings: List[Dict]) -> Dict:
             'listings_with_price': 0
         }
     
-    # Filter out listings with price 0
-    prices = [listing['price'] for listing in listings if listing['price'] > 0]
+    # Filter out listings with price 0 or without a price ("N/A")
+    prices = [listing['price'] for listing in listings
+              if isinstance(listing.get('price'), (int, float)) and listing['price'] > 0]
     
     if not prices:
         return {
@@ -52,13 +53,18 @@ def get_booking_listings_summary(listings: List[Dict]) -> Dict:
     if not listings:
         return {"message": "No listings found"}
     
-    price_analysis = calculate_price_analyses(listings)
+    price_analysis = calculate_booking_price_analyses(listings)
     
     # Get unique property names
-    unique_properties = set(listing['listing']['name'] for listing in listings)
+    unique_properties = set(listing['name'] for listing in listings)
     
-    # Get average rating
-    ratings = [listing['listing']['rating'] for listing in listings if listing['listing'].get('rating')]
+    # Get average rating (Booking ratings are stored as text, "N/A" when missing)
+    ratings = []
+    for listing in listings:
+        try:
+            ratings.append(float(listing.get('rating')))
+        except (TypeError, ValueError):
+            continue
     avg_rating = round(sum(ratings) / len(ratings), 2) if ratings else 0
     
     return {
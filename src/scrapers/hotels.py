@@ -7,6 +7,8 @@ class Listing(BaseModel):
     price: float = Field(description="The price per night")
     rating: float = Field(description="The rating score")
     bed_configuration: Optional[str] = Field(description="Bed configuration details", default=None)
+    # Read from the page data, never asked of the Vision model
+    listing_id: Optional[str] = Field(description="The site's own id for the listing", default=None)
 
     @classmethod
     def get_json_schema(cls) -> Dict:
@@ -0,0 +1,224 @@
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+from contextlib import asynccontextmanager
+from utils.resource_blocking import ResourceBlocker, RoutingProfile
+from typing import AsyncIterator, Awaitable, Callable, Deque, List, Optional, Set
+from collections import deque
+
+import asyncio
+import logging
+import os
+import random
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Common user agents
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+]
+
+# Custom script to mask automation
+ANTI_DETECTION_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+"""
+
+
+class PooledPage:
+    """A warmed browser context and page checked out from the pool"""
+
+    def __init__(self, context: BrowserContext, page: Page):
+        self.context = context
+        self.page = page
+        self.navigations = 0
+        # Sites whose cookie banner was already dismissed in this context
+        self.consent_handled: Set[str] = set()
+        # Request filtering for the site currently loaded in this page
+        self.routing_profile: Optional[RoutingProfile] = None
+
+
+class BrowserPool:
+    """Process-wide Chromium with a bounded pool of reusable contexts
+
+    A single browser is launched lazily and shared by every scraper. Callers
+    check out a PooledPage, use it, and return it; contexts are recycled once
+    they have served `max_navigations` navigations.
+    """
+
+    def __init__(self, size: int = 2, max_navigations: int = 25, headless: bool = False,
+                 block_resources: Optional[bool] = None,
+                 context_setup: Optional[Callable[[BrowserContext], Awaitable[None]]] = None):
+        """
+        Args:
+            size (int): Maximum number of contexts alive at once
+            max_navigations (int): Navigations served by a context before it is recycled
+            headless (bool): Run Chromium headless (False avoids most bot detection)
+            block_resources (bool): Abort requests the site's routing profile does not need
+                                    (defaults to the BLOCK_RESOURCES environment variable, on)
+            context_setup: Coroutine run on every new context, e.g. to install replay routes
+        """
+        self.context_setup = context_setup
+        if block_resources is None:
+            block_resources = os.getenv('BLOCK_RESOURCES', '1').lower() not in ('0', 'false', 'no')
+        self.resource_blocker: Optional[ResourceBlocker] = ResourceBlocker() if block_resources else None
+        self.size = max(1, size)
+        self.max_navigations = max_navigations
+        self.headless = headless
+        self.playwright: Optional[Playwright] = None
+        self.browser: Optional[Browser] = None
+        self._idle: Deque[PooledPage] = deque()
+        # Signalled when a page is returned or a slot frees up for a new context
+        self._available: Optional[asyncio.Condition] = None
+        self._slots: List[PooledPage] = []
+        self._created = 0
+        self._lock = asyncio.Lock()
+
+    async def start(self, warm: int = 0) -> None:
+        """Launch the browser and optionally pre-create `warm` contexts"""
+        async with self._lock:
+            if not self.browser:
+                self.playwright = await async_playwright().start()
+                self.browser = await self.playwright.chromium.launch(
+                    headless=self.headless,
+                    args=[
+                        '--disable-blink-features=AutomationControlled',
+                        '--disable-features=IsolateOrigins,site-per-process'
+                    ]
+                )
+                self._idle = deque()
+                self._available = asyncio.Condition()
+                logger.info(f"Browser pool started (size={self.size})")
+
+            while self._created < min(warm, self.size):
+                self._created += 1
+                self._idle.append(await self._new_slot())
+
+    async def _new_slot(self) -> PooledPage:
+        context = await self.browser.new_context(
+            user_agent=random.choice(USER_AGENTS),
+            viewport={'width': 1920, 'height': 1080},
+            java_script_enabled=True,
+        )
+        await context.add_init_script(ANTI_DETECTION_SCRIPT)
+        if self.context_setup:
+            await self.context_setup(context)
+        page = await context.new_page()
+        slot = PooledPage(context, page)
+        if self.resource_blocker:
+            await self.resource_blocker.install(page, lambda: slot.routing_profile)
+        self._slots.append(slot)
+        return slot
+
+    async def _close_slot(self, slot: PooledPage) -> None:
+        if slot in self._slots:
+            self._slots.remove(slot)
+        try:
+            await slot.context.close()
+        except Exception as e:
+            logger.warning(f"Failed to close browser context: {str(e)}")
+
+    async def acquire(self) -> PooledPage:
+        """Check out a page, creating a context if the pool is not full yet
+
+        Waits for a page to be returned, or for a slot to free up when a context
+        could not be replaced, once `size` contexts exist.
+        """
+        await self.start()
+        async with self._available:
+            while True:
+                if self._idle:
+                    return self._idle.popleft()
+                if self._created < self.size:
+                    self._created += 1
+                    break
+                await self._available.wait()
+        try:
+            return await self._new_slot()
+        except Exception:
+            await self._free_slot()
+            raise
+
+    async def _free_slot(self) -> None:
+        """Give up a context slot and let a waiting caller create one instead"""
+        async with self._available:
+            self._created -= 1
+            self._available.notify()
+
+    async def release(self, slot: PooledPage, discard: bool = False) -> None:
+        """Return a page to the pool, recycling its context when it is worn out or broken"""
+        if discard or slot.navigations >= self.max_navigations or slot.page.is_closed():
+            logger.info(f"Recycling browser context after {slot.navigations} navigations")
+            await self._close_slot(slot)
+            try:
+                slot = await self._new_slot()
+            except Exception as e:
+                logger.error(f"Failed to create replacement browser context: {str(e)}")
+                await self._free_slot()
+                return
+        async with self._available:
+            self._idle.append(slot)
+            self._available.notify()
+
+    async def new_page(self, slot: PooledPage) -> Page:
+        """Open an extra page in a checked-out context with the same request filtering
+
+        The caller closes it; the context still belongs to `slot`.
+        """
+        page = await slot.context.new_page()
+        if self.resource_blocker:
+            await self.resource_blocker.install(page, lambda: slot.routing_profile)
+        return page
+
+    @asynccontextmanager
+    async def checkout(self) -> AsyncIterator[PooledPage]:
+        """Check out a page for the duration of a `with` block"""
+        slot = await self.acquire()
+        discard = False
+        try:
+            yield slot
+        except Exception:
+            discard = True
+            raise
+        finally:
+            await self.release(slot, discard=discard)
+
+    async def close(self) -> None:
+        """Close every context, the browser and the playwright driver"""
+        if self.resource_blocker and self.browser:
+            logger.info(f"Resource blocking: {self.resource_blocker.stats()}")
+        for slot in list(self._slots):
+            await self._close_slot(slot)
+        if self.browser:
+            await self.browser.close()
+            self.browser = None
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+        self._idle = deque()
+        self._available = None
+        self._created = 0
+
+
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool(**kwargs) -> BrowserPool:
+    """Get the process-wide browser pool, creating it on first use
+
+    Keyword arguments are passed to BrowserPool and only apply on creation.
+    """
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool(**kwargs)
+    return _browser_pool
+
+
+async def close_browser_pool() -> None:
+    """Close the process-wide browser pool if it was started"""
+    global _browser_pool
+    if _browser_pool is not None:
+        await _browser_pool.close()
+        _browser_pool = None
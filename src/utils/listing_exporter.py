@@ -0,0 +1,208 @@
+from bson import json_util
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import logging
+import os
+import threading
+import uuid
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('ndjson', 'parquet')
+
+# Parquet columns of every flattened listing as (name, type); other fields are not exported
+COMMON_COLUMNS = [
+    ('_id', 'string'), ('site', 'string'), ('timestamp', 'string'), ('url', 'string'),
+    ('start_date', 'string'), ('end_date', 'string'), ('name_key', 'string'), ('listing_key', 'string'),
+    ('inserted_at', 'string'), ('updated_at', 'string'),
+]
+
+SITE_COLUMNS = {
+    'booking': [
+        ('name', 'string'), ('price', 'float64'), ('rating', 'float64'),
+        ('bed_configuration', 'string'), ('listing_id', 'string'),
+    ],
+    'airbnb': [
+        ('listing_name', 'string'), ('listing_price', 'float64'), ('listing_rating', 'float64'),
+        ('listing_bed_configuration', 'string'), ('listing_listing_id', 'string'),
+    ],
+}
+
+
+def flatten_listing(listing: Dict) -> Dict:
+    """Flatten a listing document into scalar columns ('listing.price' -> 'listing_price')"""
+    row = {}
+    for key, value in listing.items():
+        if key == '_id':
+            row[key] = str(value)
+        elif isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                row[f"{key}_{sub_key}"] = sub_value
+        else:
+            row[key] = value
+    return row
+
+
+def parquet_schema(site: str) -> 'pa.Schema':
+    """Fixed schema for a site's Parquet files, so every part file reads as one dataset"""
+    return pa.schema([(name, getattr(pa, data_type)()) for name, data_type in COMMON_COLUMNS + SITE_COLUMNS.get(site, [])])
+
+
+def _column_value(value, data_type: 'pa.DataType'):
+    # The "N/A" placeholder and values of the wrong type become nulls
+    if value is None or value == "N/A":
+        return None
+    if pa.types.is_floating(data_type):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    return str(value)
+
+
+class ListingExporter:
+    """Append listings to files partitioned by site and checkin date
+
+    Layout: <directory>/site=<site>/checkin=<YYYY-MM-DD>/part-<run>.<ext>
+
+    NDJSON partitions are appended to as listings arrive. Parquet keeps one
+    writer per partition open for the run, with a fixed per-site schema, and
+    writes a row group every `row_group_size` rows; `close` writes the rest and
+    finishes the files.
+    """
+
+    def __init__(self, directory: str = "data/exports", export_format: str = 'ndjson', row_group_size: int = 5000):
+        """
+        Args:
+            directory (str): Root directory of the partitioned dataset
+            export_format (str): 'ndjson' or 'parquet' (requires pyarrow)
+            row_group_size (int): Parquet rows buffered per partition before a row group is written
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}")
+        if export_format == 'parquet' and pa is None:
+            raise ValueError("Parquet export requires pyarrow to be installed")
+
+        self.directory = directory
+        self.export_format = export_format
+        self.run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.row_group_size = max(1, row_group_size)
+        self.rows_written = 0
+        # Parquet partition path -> open writer and the rows not written yet
+        self._writers: Dict[str, 'pq.ParquetWriter'] = {}
+        self._pending: Dict[str, List[Dict]] = {}
+        self._lock = threading.Lock()
+
+    def _partition_dir(self, site: str, checkin: str) -> str:
+        path = os.path.join(self.directory, f"site={site}", f"checkin={checkin or 'unknown'}")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def write(self, listings: List, site: str) -> int:
+        """Write one batch of listings (dicts or Pydantic models)
+
+        Returns:
+            int: Number of listings written
+        """
+        partitions: Dict[str, List[Dict]] = {}
+        for listing in listings:
+            if hasattr(listing, 'model_dump'):
+                listing = listing.model_dump()
+            partitions.setdefault(listing.get('start_date'), []).append(listing)
+
+        with self._lock:
+            for checkin, rows in partitions.items():
+                partition_dir = self._partition_dir(site, checkin)
+                if self.export_format == 'ndjson':
+                    self._append_ndjson(partition_dir, rows)
+                else:
+                    self._write_parquet(partition_dir, site, rows)
+            self.rows_written += len(listings)
+
+        if listings:
+            logger.info(f"Exported {len(listings)} {site} listings to {self.directory}")
+        return len(listings)
+
+    def _append_ndjson(self, partition_dir: str, rows: List[Dict]) -> None:
+        path = os.path.join(partition_dir, f"part-{self.run_id}.ndjson")
+        with open(path, 'a', encoding='utf-8') as f:
+            for row in rows:
+                # json_util handles MongoDB-specific types
+                f.write(json_util.dumps(row))
+                f.write('\n')
+
+    def _write_parquet(self, partition_dir: str, site: str, rows: List[Dict]) -> None:
+        path = os.path.join(partition_dir, f"part-{self.run_id}.parquet")
+        writer = self._writers.get(path)
+        if writer is None:
+            writer = pq.ParquetWriter(path, parquet_schema(site))
+            self._writers[path] = writer
+        pending = self._pending.setdefault(path, [])
+        pending.extend(rows)
+        if len(pending) >= self.row_group_size:
+            self._flush_parquet(path)
+
+    def _flush_parquet(self, path: str) -> None:
+        rows = self._pending.pop(path, [])
+        if not rows:
+            return
+        writer = self._writers[path]
+        columns = {field.name: [] for field in writer.schema}
+        for row in rows:
+            flat = flatten_listing(row)
+            for field in writer.schema:
+                columns[field.name].append(_column_value(flat.get(field.name), field.type))
+        writer.write_table(pa.Table.from_pydict(columns, schema=writer.schema))
+
+    def close(self) -> None:
+        """Write the buffered Parquet rows and finish every open part file"""
+        with self._lock:
+            for path, writer in self._writers.items():
+                try:
+                    self._flush_parquet(path)
+                finally:
+                    writer.close()
+            if self._writers:
+                logger.info(f"Closed {len(self._writers)} Parquet part files in {self.directory}")
+            self._writers = {}
+            self._pending = {}
+
+    def export_collection(self, mongo_client, site: str, query: Optional[Dict] = None, batch_size: int = 1000) -> int:
+        """Export an existing Mongo collection in bounded-size batches
+
+        Args:
+            mongo_client (MongoDBClient): Client to read from
+            site (str): Collection name, also used as the site partition
+            query (Dict): Optional filter, e.g. a date range
+            batch_size (int): Documents written per batch
+
+        Returns:
+            int: Number of listings exported
+        """
+        cursor = mongo_client.db[site].find(query or {}, batch_size=batch_size).sort('start_date', 1)
+        exported = 0
+        for batch in _batched(cursor, batch_size):
+            exported += self.write(batch, site)
+        logger.info(f"Exported {exported} {site} listings")
+        return exported
+
+
+def _batched(iterable: Iterable, size: int) -> Iterable[List]:
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
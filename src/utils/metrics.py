@@ -0,0 +1,247 @@
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'oliveiras'
+
+# (name, sorted label items)
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict) -> MetricKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))]
+
+
+def _prom_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for name, value in labels:
+        value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class Metrics:
+    """Spans, counters and value observations for one scrape run
+
+    `span` times a block of work per stage; `increment` counts events such as
+    retries; `observe` records sizes such as listings per window or bytes
+    captured. Every span and observation is also appended to a JSON-lines
+    trace file. Safe to use from the event loop and from writer threads.
+    """
+
+    def __init__(self, directory: str = "data/metrics", trace: bool = True,
+                 prometheus_path: Optional[str] = None):
+        """
+        Args:
+            directory (str): Where the trace file is written
+            trace (bool): Write every span and observation to trace-<run_id>.jsonl
+            prometheus_path (str): Prometheus textfile, defaults to <directory>/oliveiras.prom
+        """
+        self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.directory = directory
+        self.trace_path = os.path.join(directory, f"trace-{self.run_id}.jsonl") if trace else None
+        self.prometheus_path = prometheus_path or os.path.join(directory, f"{METRIC_PREFIX}.prom")
+        self.durations: Dict[MetricKey, List[float]] = {}
+        self.errors: Counter = Counter()
+        self.counters: Counter = Counter()
+        self.values: Dict[MetricKey, List[float]] = {}
+        self._trace_file: Optional[IO] = None
+        self._lock = threading.Lock()
+
+    def _trace(self, event: Dict) -> None:
+        if not self.trace_path:
+            return
+        if self._trace_file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._trace_file = open(self.trace_path, 'a', encoding='utf-8')
+        self._trace_file.write(json.dumps(event) + "\n")
+
+    @contextmanager
+    def span(self, stage: str, **labels) -> Iterator[None]:
+        """Time the enclosed block as one `stage` span, marking it as an error if it raises"""
+        started = time.monotonic()
+        status = 'ok'
+        try:
+            yield
+        except BaseException:
+            status = 'error'
+            raise
+        finally:
+            duration = time.monotonic() - started
+            key = _key(stage, labels)
+            with self._lock:
+                self.durations.setdefault(key, []).append(duration)
+                if status == 'error':
+                    self.errors[key] += 1
+                self._trace({
+                    'ts': datetime.now().isoformat(),
+                    'type': 'span',
+                    'stage': stage,
+                    'duration_ms': round(duration * 1000, 1),
+                    'status': status,
+                    'labels': dict(key[1]),
+                })
+
+    def increment(self, name: str, value: int = 1, **labels) -> None:
+        """Add to a counter such as screenshot or Vision retries"""
+        with self._lock:
+            self.counters[_key(name, labels)] += value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record one value such as listings per window or bytes captured"""
+        key = _key(name, labels)
+        with self._lock:
+            self.values.setdefault(key, []).append(value)
+            self._trace({
+                'ts': datetime.now().isoformat(),
+                'type': 'value',
+                'name': name,
+                'value': value,
+                'labels': dict(key[1]),
+            })
+
+    def summary(self) -> List[Dict]:
+        """Per stage: span count, errors, total, p50, p95 and max seconds"""
+        with self._lock:
+            items = [(key, sorted(values)) for key, values in self.durations.items()]
+            errors = dict(self.errors)
+        rows = []
+        for (stage, labels), values in sorted(items):
+            rows.append({
+                'stage': stage + (_prom_labels(labels) if labels else ""),
+                'count': len(values),
+                'errors': errors.get((stage, labels), 0),
+                'total': sum(values),
+                'p50': _percentile(values, 0.5),
+                'p95': _percentile(values, 0.95),
+                'max': values[-1],
+            })
+        return rows
+
+    def summary_table(self) -> str:
+        """Human readable run summary of stage timings, counters and observed values"""
+        header = f"{'stage':<42}{'count':>7}{'errors':>8}{'total s':>10}{'p50 s':>9}{'p95 s':>9}{'max s':>9}"
+        lines = [header, '-' * len(header)]
+        for row in self.summary():
+            lines.append(f"{row['stage']:<42}{row['count']:>7}{row['errors']:>8}{row['total']:>10.2f}"
+                         f"{row['p50']:>9.2f}{row['p95']:>9.2f}{row['max']:>9.2f}")
+
+        with self._lock:
+            counters = sorted(self.counters.items())
+            values = sorted((key, sum(v), len(v)) for key, v in self.values.items())
+        if counters or values:
+            lines.append("")
+        for (name, labels), count in counters:
+            lines.append(f"{name + _prom_labels(labels):<42}{count:>7}")
+        for (name, labels), total, count in values:
+            lines.append(f"{name + _prom_labels(labels):<42}{count:>7}  total {total:,.0f}  mean {total / count:,.1f}")
+        return "\n".join(lines)
+
+    def prometheus_text(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            durations = sorted(self.durations.items())
+            errors = dict(self.errors)
+            counters = sorted(self.counters.items())
+            values = sorted(self.values.items())
+
+        if durations:
+            name = f"{METRIC_PREFIX}_stage_duration_seconds"
+            lines.append(f"# TYPE {name} summary")
+            for (stage, labels), samples in durations:
+                stage_labels = (('stage', stage),) + labels
+                ordered = sorted(samples)
+                for q in (0.5, 0.95):
+                    lines.append(f"{name}{_prom_labels(stage_labels + (('quantile', str(q)),))} {_percentile(ordered, q)}")
+                lines.append(f"{name}_sum{_prom_labels(stage_labels)} {sum(samples)}")
+                lines.append(f"{name}_count{_prom_labels(stage_labels)} {len(samples)}")
+            name = f"{METRIC_PREFIX}_stage_errors_total"
+            lines.append(f"# TYPE {name} counter")
+            for (stage, labels), _ in durations:
+                lines.append(f"{name}{_prom_labels((('stage', stage),) + labels)} {errors.get((stage, labels), 0)}")
+
+        for counter_name in sorted({name for (name, _), _ in counters}):
+            name = f"{METRIC_PREFIX}_{counter_name}_total"
+            lines.append(f"# TYPE {name} counter")
+            for (key_name, labels), count in counters:
+                if key_name == counter_name:
+                    lines.append(f"{name}{_prom_labels(labels)} {count}")
+
+        for value_name in sorted({name for (name, _), _ in values}):
+            name = f"{METRIC_PREFIX}_{value_name}"
+            lines.append(f"# TYPE {name} summary")
+            for (key_name, labels), samples in values:
+                if key_name == value_name:
+                    lines.append(f"{name}_sum{_prom_labels(labels)} {sum(samples)}")
+                    lines.append(f"{name}_count{_prom_labels(labels)} {len(samples)}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self) -> str:
+        """Atomically write the Prometheus textfile (for node_exporter's textfile collector)
+
+        Returns:
+            str: Path of the written file
+        """
+        directory = os.path.dirname(self.prometheus_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.prometheus_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, self.prometheus_path)
+        return self.prometheus_path
+
+    def close(self) -> None:
+        """Close the trace file"""
+        with self._lock:
+            if self._trace_file:
+                self._trace_file.close()
+                self._trace_file = None
+
+
+_metrics: Optional[Metrics] = None
+
+
+def get_metrics() -> Metrics:
+    """Get the process-wide metrics for the current run, creating them on first use
+
+    Configured by METRICS_DIR, METRICS_TRACE (on by default) and PROMETHEUS_TEXTFILE.
+    """
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics(
+            directory=os.getenv('METRICS_DIR', 'data/metrics'),
+            trace=os.getenv('METRICS_TRACE', '1').lower() not in ('0', 'false', 'no'),
+            prometheus_path=os.getenv('PROMETHEUS_TEXTFILE'),
+        )
+    return _metrics
+
+
+def close_metrics() -> None:
+    """Close the process-wide metrics if they were created"""
+    global _metrics
+    if _metrics is not None:
+        _metrics.close()
+        _metrics = None
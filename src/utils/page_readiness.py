@@ -0,0 +1,92 @@
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+from typing import Optional
+from urllib.parse import urlparse
+
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Element that shows the results are rendered, per site host suffix
+READY_SELECTORS = {
+    'booking.com': "div[data-testid='property-card'], [data-testid='no-results-message']",
+    'airbnb.com': "#data-deferred-state-0, div[itemprop='itemListElement'], #site-content",
+}
+
+COOKIE_SELECTORS = [
+    "button[data-testid='accept-btn']",
+    "button:has-text('Accept')",
+    "button:has-text('Accept all')",
+    "button:has-text('Only necessary')",
+    "[aria-label='Only necessary']",
+    "#accept-cookies",
+]
+
+# Time limits in milliseconds
+READY_TIMEOUT_MS = 30000
+NETWORK_IDLE_TIMEOUT_MS = 5000
+CONSENT_TIMEOUT_MS = 2500
+
+
+def ready_selector_for_url(url: str) -> Optional[str]:
+    host = urlparse(url).netloc.lower()
+    for suffix, selector in READY_SELECTORS.items():
+        if host == suffix or host.endswith('.' + suffix):
+            return selector
+    return None
+
+
+async def wait_until_ready(page: Page, selector: Optional[str] = None, timeout: int = READY_TIMEOUT_MS,
+                           network_idle_timeout: int = NETWORK_IDLE_TIMEOUT_MS) -> bool:
+    """Wait for the page's results instead of sleeping a fixed time
+
+    Waits for the site's ready selector to be attached, then gives the network
+    a short window to go idle. Sites that keep long-polling never reach network
+    idle, so that step is capped and not treated as a failure.
+
+    Returns:
+        bool: True if the ready selector appeared within the timeout
+    """
+    selector = selector or ready_selector_for_url(page.url)
+    ready = True
+    if selector:
+        try:
+            await page.wait_for_selector(selector, state='attached', timeout=timeout)
+        except PlaywrightTimeoutError:
+            logger.warning(f"Page not ready after {timeout} ms: {selector}")
+            ready = False
+
+    try:
+        await page.wait_for_load_state('networkidle', timeout=network_idle_timeout)
+    except PlaywrightTimeoutError:
+        logger.debug("Network did not go idle, continuing")
+    return ready
+
+
+async def dismiss_cookie_consent(page: Page, timeout: int = CONSENT_TIMEOUT_MS) -> bool:
+    """Click the cookie banner if one shows up within a single short deadline
+
+    All known selectors are raced at once through one combined locator, so a
+    page without a banner costs `timeout` rather than one timeout per selector.
+
+    Returns:
+        bool: True if a banner was dismissed
+    """
+    locator = page.locator(COOKIE_SELECTORS[0])
+    for selector in COOKIE_SELECTORS[1:]:
+        locator = locator.or_(page.locator(selector))
+    button = locator.first
+
+    try:
+        await button.wait_for(state='visible', timeout=timeout)
+    except PlaywrightTimeoutError:
+        return False
+
+    try:
+        await button.click(timeout=timeout)
+        await button.wait_for(state='hidden', timeout=timeout)
+        logger.info("Dismissed cookie consent banner")
+    except PlaywrightTimeoutError:
+        logger.warning("Cookie consent banner did not close after clicking")
+    return True
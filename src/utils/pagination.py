@@ -0,0 +1,70 @@
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+from typing import Callable, Hashable, List, Optional, Sequence
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Time limit in milliseconds for new results to appear after scrolling or clicking "load more"
+LOAD_MORE_TIMEOUT_MS = 5000
+
+COUNT_CARDS_SCRIPT = "(selector) => document.querySelectorAll(selector).length"
+
+
+def set_query_param(url: str, key: str, value) -> str:
+    """Return `url` with one query parameter added or replaced"""
+    parts = urlparse(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != key]
+    query.append((key, str(value)))
+    return urlunparse(parts._replace(query=urlencode(query)))
+
+
+def dedupe_listings(listings: Sequence, key: Callable[[object], Optional[Hashable]]) -> List:
+    """Drop listings whose key was already seen, keeping the first occurrence
+
+    A listing whose key is None cannot be told apart from others and is always kept.
+    """
+    seen = set()
+    unique = []
+    for listing in listings:
+        listing_key = key(listing)
+        if listing_key is None:
+            unique.append(listing)
+            continue
+        if listing_key in seen:
+            continue
+        seen.add(listing_key)
+        unique.append(listing)
+    return unique
+
+
+async def load_more_results(page: Page, card_selector: str, button_selector: str, max_rounds: int,
+                            timeout: int = LOAD_MORE_TIMEOUT_MS) -> int:
+    """Grow an infinite-scroll result list until it stops growing
+
+    Each round clicks the "load more" button if there is one, otherwise
+    scrolls to the bottom, then waits for more cards than before.
+
+    Returns:
+        int: Number of result cards on the page at the end
+    """
+    count = await page.evaluate(COUNT_CARDS_SCRIPT, card_selector)
+    for _ in range(max_rounds):
+        button = page.locator(button_selector).first
+        if await button.is_visible():
+            await button.click()
+        else:
+            await page.mouse.wheel(0, 20000)
+        try:
+            await page.wait_for_function(
+                "([selector, count]) => document.querySelectorAll(selector).length > count",
+                arg=[card_selector, count],
+                timeout=timeout,
+            )
+        except PlaywrightTimeoutError:
+            break
+        count = await page.evaluate(COUNT_CARDS_SCRIPT, card_selector)
+    return count
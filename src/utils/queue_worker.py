@@ -0,0 +1,135 @@
+from typing import Dict, Optional, Set, Tuple
+from database.job_queue import JobQueue
+from utils.scheduler import JobHandler, OnFinished, ScrapeJob, TokenBucket
+
+import asyncio
+import logging
+import random
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class QueueWorker:
+    """Runs scrape jobs claimed from a shared JobQueue until the range is drained
+
+    `slots` claim loops run at once. A job stays leased, with heartbeats, from
+    its claim until its listings are written, so a worker that dies at any
+    point leaves the job to be reclaimed by another one.
+    """
+
+    def __init__(
+        self,
+        job_queue: JobQueue,
+        handler: JobHandler,
+        slots: int = 2,
+        rate_limits: Optional[Dict[str, float]] = None,
+        jitter: Tuple[float, float] = (0.5, 2.0),
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        poll_interval: float = 5.0,
+        heartbeat_interval: Optional[float] = None,
+    ):
+        """
+        Args:
+            job_queue (JobQueue): Queue to claim jobs from
+            handler: Coroutine that runs a job, see JobHandler
+            slots (int): Jobs run at once by this worker
+            rate_limits (Dict[str, float]): Job starts allowed per second per site, for this worker
+            jitter (Tuple[float, float]): Random delay range (seconds) added before each job
+            start_date (str): First checkin date to claim
+            end_date (str): Last checkin date to claim
+            poll_interval (float): Seconds to wait when no job is available yet
+            heartbeat_interval (float): Seconds between lease renewals, a third of the lease by default
+        """
+        self.job_queue = job_queue
+        self.handler = handler
+        self.slots = max(1, slots)
+        self.buckets = {site: TokenBucket(rate) for site, rate in (rate_limits or {}).items()}
+        self.jitter = jitter
+        self.start_date = start_date
+        self.end_date = end_date
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval or job_queue.lease.total_seconds() / 3
+        self.done = 0
+        self.failed = 0
+        # Ids of claimed jobs whose listings are not written yet
+        self._active: Set = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _finish(self, job_id) -> None:
+        self._active.discard(job_id)
+
+    def _on_written(self, job_id, job: ScrapeJob) -> OnFinished:
+        def record(success: bool, listings_count: int, error: Optional[str] = None) -> None:
+            if success:
+                finished = self.job_queue.complete(job_id, listings_count)
+                self.done += 1
+            else:
+                finished = self.job_queue.fail(job_id, error or "Failed to parse or write listings")
+                self.failed += 1
+            if not finished:
+                logger.warning(f"Lost the lease on {job.site} {job.start_date} before it finished")
+            self._loop.call_soon_threadsafe(self._finish, job_id)
+        return record
+
+    async def _run_claimed(self, doc: Dict) -> None:
+        job = ScrapeJob(doc['site'], doc['url'], doc['checkin'], doc['checkout'])
+        job.attempts = doc.get('attempts', 1)
+        bucket = self.buckets.get(job.site)
+        if bucket:
+            await bucket.acquire()
+        await asyncio.sleep(random.uniform(*self.jitter))
+
+        try:
+            await self.handler(job, self._on_written(doc['_id'], job))
+        except Exception as e:
+            logger.error(f"{job.site} {job.start_date} failed (attempt {job.attempts}): {str(e)}")
+            await asyncio.to_thread(self.job_queue.fail, doc['_id'], str(e))
+            self.failed += 1
+            self._finish(doc['_id'])
+
+    async def _claim_loop(self) -> None:
+        while True:
+            doc = await asyncio.to_thread(self.job_queue.claim, self.start_date, self.end_date)
+            if doc:
+                self._active.add(doc['_id'])
+                await self._run_claimed(doc)
+                continue
+
+            await asyncio.to_thread(self.job_queue.requeue_expired)
+            unfinished = await asyncio.to_thread(self.job_queue.has_unfinished, self.start_date, self.end_date)
+            if not unfinished and not self._active:
+                return
+            # Other workers still hold jobs that may come back if their leases expire
+            await asyncio.sleep(self.poll_interval)
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            active = list(self._active)
+            if not active:
+                continue
+            try:
+                extended = await asyncio.to_thread(self.job_queue.heartbeat, active)
+                if extended < len(active):
+                    logger.warning(f"{len(active) - extended} job leases were lost to other workers")
+            except Exception as e:
+                logger.error(f"Heartbeat failed: {str(e)}")
+
+    async def run(self) -> Dict[str, int]:
+        """Claim and run jobs until none are left in the range
+
+        Returns:
+            Dict[str, int]: Jobs done and failed by this worker
+        """
+        self._loop = asyncio.get_running_loop()
+        logger.info(f"Worker {self.job_queue.worker_id} started with {self.slots} slots")
+        heartbeat = asyncio.create_task(self._heartbeat_loop())
+        try:
+            await asyncio.gather(*(self._claim_loop() for _ in range(self.slots)))
+        finally:
+            heartbeat.cancel()
+        stats = {'done': self.done, 'failed': self.failed}
+        logger.info(f"Worker {self.job_queue.worker_id} finished: {stats}")
+        return stats
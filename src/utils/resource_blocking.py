@@ -0,0 +1,135 @@
+from playwright.async_api import Page, Route
+from collections import Counter
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
+from urllib.parse import urlparse
+
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Third-party analytics and ad domains never needed to read listings
+TRACKER_DOMAINS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'googlesyndication.com',
+    'googleadservices.com',
+    'facebook.net',
+    'connect.facebook.com',
+    'hotjar.com',
+    'bat.bing.com',
+    'clarity.ms',
+    'criteo.com',
+    'criteo.net',
+    'taboola.com',
+    'scorecardresearch.com',
+    'branch.io',
+    'tiktok.com',
+    'pinterest.com',
+    'quantserve.com',
+    'adsrvr.org',
+)
+
+# Rough average transfer size per blocked request, used to estimate bytes saved
+ESTIMATED_BYTES = {
+    'image': 60_000,
+    'media': 500_000,
+    'font': 40_000,
+    'stylesheet': 30_000,
+    'script': 40_000,
+    'xhr': 5_000,
+    'fetch': 5_000,
+    'ping': 500,
+    'beacon': 500,
+}
+DEFAULT_ESTIMATED_BYTES = 5_000
+
+
+class RoutingProfile:
+    """Which requests a page may make while scraping a given site"""
+
+    def __init__(self, name: str, blocked_types: FrozenSet[str] = frozenset(), block_trackers: bool = True):
+        """
+        Args:
+            name (str): Profile name, used in the counters
+            blocked_types (FrozenSet[str]): Playwright resource types to abort
+            block_trackers (bool): Abort requests to TRACKER_DOMAINS
+        """
+        self.name = name
+        self.blocked_types = frozenset(blocked_types)
+        self.block_trackers = block_trackers
+
+    def block_reason(self, resource_type: str, url: str) -> Optional[str]:
+        """Why a request should be aborted, None if it is allowed"""
+        if resource_type in self.blocked_types:
+            return resource_type
+        if self.block_trackers:
+            host = urlparse(url).netloc.lower()
+            if any(host == domain or host.endswith('.' + domain) for domain in TRACKER_DOMAINS):
+                return 'tracker'
+        return None
+
+
+# Booking is read from the DOM text, so nothing visual is needed. Airbnb may
+# fall back to a screenshot, so it keeps images, fonts and styles to render.
+ROUTING_PROFILES: Dict[str, RoutingProfile] = {
+    'booking': RoutingProfile('booking', frozenset({'image', 'media', 'font'})),
+    'airbnb': RoutingProfile('airbnb', frozenset({'media'})),
+}
+
+# Site host suffix -> profile name
+PROFILE_HOSTS = {
+    'booking.com': 'booking',
+    'airbnb.com': 'airbnb',
+}
+
+
+def profile_for_url(url: str) -> Optional[RoutingProfile]:
+    """Routing profile for the site a URL belongs to"""
+    host = urlparse(url).netloc.lower()
+    for suffix, name in PROFILE_HOSTS.items():
+        if host == suffix or host.endswith('.' + suffix):
+            return ROUTING_PROFILES.get(name)
+    return None
+
+
+class ResourceBlocker:
+    """Installs page routes that abort unneeded requests and counts what was saved"""
+
+    def __init__(self):
+        self.allowed = 0
+        self.blocked: Counter = Counter()
+        self.bytes_saved: Counter = Counter()
+
+    async def install(self, page: Page, get_profile: Callable[[], Optional[RoutingProfile]]) -> None:
+        """Route every request of a page through the profile returned by `get_profile`
+
+        The profile is looked up per request, so a pooled page can move between sites.
+        """
+        async def handle(route: Route) -> None:
+            request = route.request
+            profile = get_profile()
+            reason = profile.block_reason(request.resource_type, request.url) if profile else None
+            if reason is None:
+                self.allowed += 1
+                # Let context-level routes (e.g. offline replay) handle it, else go to the network
+                await route.fallback()
+                return
+
+            key: Tuple[str, str] = (profile.name, reason)
+            self.blocked[key] += 1
+            self.bytes_saved[key] += ESTIMATED_BYTES.get(request.resource_type, DEFAULT_ESTIMATED_BYTES)
+            await route.abort()
+
+        await page.route("**/*", handle)
+
+    def stats(self) -> Dict:
+        """Requests allowed and blocked, with the estimated bytes saved per profile and reason"""
+        return {
+            'requests_allowed': self.allowed,
+            'requests_blocked': sum(self.blocked.values()),
+            'estimated_bytes_saved': sum(self.bytes_saved.values()),
+            'blocked': {f"{profile}/{reason}": count for (profile, reason), count in self.blocked.items()},
+        }
@@ -0,0 +1,237 @@
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import asyncio
+import logging
+import random
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+# Reports a job's outcome once known: (success, listings count, error)
+OnFinished = Callable[[bool, int, Optional[str]], None]
+
+# Runs a job; returns its listings count, or None when it calls the OnFinished callback later
+JobHandler = Callable[['ScrapeJob', OnFinished], Awaitable[Optional[int]]]
+
+
+class TokenBucket:
+    """Async token bucket used to rate limit requests against a single site"""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        Args:
+            rate (float): Tokens added per second
+            capacity (int): Maximum number of tokens that can be accumulated
+        """
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, tokens: float = 1) -> None:
+        """Wait until the requested number of tokens is available and consume them"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+class ScrapeJob:
+    """A single (site, checkin, checkout) scrape window"""
+
+    def __init__(self, site: str, url: str, start_date: str, end_date: str):
+        self.site = site
+        self.url = url
+        self.start_date = start_date
+        self.end_date = end_date
+        self.status = "pending"
+        self.attempts = 0
+        self.listings_count = 0
+        self.error: Optional[str] = None
+        self.duration = 0.0
+
+    def __repr__(self) -> str:
+        return f"ScrapeJob({self.site}, {self.start_date} -> {self.end_date}, {self.status})"
+
+
+def iter_date_windows(start_date: str, end_date: str, nights: int = 1) -> List[Tuple[str, str]]:
+    """Build the list of (checkin, checkout) windows between two dates (inclusive)
+
+    Args:
+        start_date (str): First checkin date in YYYY-MM-DD format
+        end_date (str): Last checkin date in YYYY-MM-DD format
+        nights (int): Length of each stay
+
+    Returns:
+        List[Tuple[str, str]]: Checkin/checkout pairs in YYYY-MM-DD format
+    """
+    current_date = datetime.strptime(start_date, "%Y-%m-%d")
+    last_date = datetime.strptime(end_date, "%Y-%m-%d")
+
+    windows = []
+    while current_date <= last_date:
+        checkout = current_date + timedelta(days=nights)
+        windows.append((current_date.strftime("%Y-%m-%d"), checkout.strftime("%Y-%m-%d")))
+        current_date += timedelta(days=1)
+    return windows
+
+
+class DateWindowScheduler:
+    """Runs scrape jobs from a per-site queue with bounded concurrency and rate limits
+
+    Each site gets its own queue, worker count and token bucket, so a slow site
+    never blocks the other one and the total wall-clock time is driven by the
+    concurrency budget instead of the number of windows.
+
+    A handler may finish a job later than it returns, once its listings are
+    parsed and written. A job that fails at either point goes back to its
+    site's queue until it has used `max_retries` extra attempts.
+    """
+
+    def __init__(
+        self,
+        handler: JobHandler,
+        concurrency: Dict[str, int],
+        rate_limits: Dict[str, float],
+        jitter: Tuple[float, float] = (0.5, 2.0),
+        max_retries: int = 1,
+    ):
+        """
+        Args:
+            handler: Coroutine that runs a job and returns the number of listings scraped,
+                     or returns None and reports the outcome later through its callback
+            concurrency (Dict[str, int]): Number of windows run at once per site
+            rate_limits (Dict[str, float]): Job starts allowed per second per site
+            jitter (Tuple[float, float]): Random delay range (seconds) added before each job
+            max_retries (int): Number of extra attempts for a failed job
+        """
+        self.handler = handler
+        self.concurrency = concurrency
+        self.buckets = {site: TokenBucket(rate) for site, rate in rate_limits.items()}
+        self.jitter = jitter
+        self.max_retries = max_retries
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.jobs: List[ScrapeJob] = []
+        # Jobs per site that have not reached a final status, and the workers to stop once none are left
+        self._unfinished: Dict[str, int] = {}
+        self._workers: Dict[str, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def add_job(self, job: ScrapeJob) -> None:
+        """Queue a job for its site"""
+        if job.site not in self.queues:
+            self.queues[job.site] = asyncio.Queue()
+        self.queues[job.site].put_nowait(job)
+        self.jobs.append(job)
+        self._unfinished[job.site] = self._unfinished.get(job.site, 0) + 1
+
+    def _on_finished(self, job: ScrapeJob) -> OnFinished:
+        """Callback for the handler to report the outcome of this attempt, from any thread"""
+        attempt = job.attempts
+
+        def finished(success: bool, listings_count: int, error: Optional[str] = None) -> None:
+            self._loop.call_soon_threadsafe(self._finish_attempt, job, attempt, success, listings_count, error)
+        return finished
+
+    def _finish_attempt(self, job: ScrapeJob, attempt: int, success: bool, listings_count: Optional[int],
+                        error: Optional[str] = None) -> None:
+        if job.attempts != attempt or job.status != "running":
+            return
+
+        if success:
+            job.status = "done"
+            job.error = None
+            if listings_count is not None:
+                job.listings_count = listings_count
+        elif job.attempts <= self.max_retries:
+            job.status = "pending"
+            job.error = error
+            logger.warning(f"{job.site} {job.start_date} failed (attempt {job.attempts}): {error}, retrying...")
+            self.queues[job.site].put_nowait(job)
+            return
+        else:
+            job.status = "failed"
+            job.error = error
+
+        self._report(job)
+        self._unfinished[job.site] -= 1
+        if self._unfinished[job.site] == 0:
+            # Wake the site's idle workers so they can exit
+            for _ in range(self._workers.get(job.site, 0)):
+                self.queues[job.site].put_nowait(None)
+
+    async def _run_job(self, job: ScrapeJob) -> None:
+        job.attempts += 1
+        bucket = self.buckets.get(job.site)
+        if bucket:
+            await bucket.acquire()
+        await asyncio.sleep(random.uniform(*self.jitter))
+
+        job.status = "running"
+        started = time.monotonic()
+        try:
+            listings_count = await self.handler(job, self._on_finished(job))
+        except Exception as e:
+            job.duration = time.monotonic() - started
+            self._finish_attempt(job, job.attempts, False, None, str(e))
+            return
+        job.duration = time.monotonic() - started
+        if listings_count is not None:
+            self._finish_attempt(job, job.attempts, True, listings_count)
+
+    def _report(self, job: ScrapeJob) -> None:
+        finished = sum(1 for j in self.jobs if j.status in ("done", "failed"))
+        progress = f"[{finished}/{len(self.jobs)}]"
+        if job.status == "done":
+            logger.info(f"{progress} {job.site} {job.start_date} -> {job.end_date}: "
+                        f"{job.listings_count} listings, captured in {job.duration:.1f}s")
+        else:
+            logger.error(f"{progress} {job.site} {job.start_date} -> {job.end_date} failed "
+                         f"after {job.attempts} attempts: {job.error}")
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            job = await queue.get()
+            try:
+                if job is None:
+                    return
+                await self._run_job(job)
+            finally:
+                queue.task_done()
+
+    async def run(self) -> List[ScrapeJob]:
+        """Run all queued jobs and return them with their final status"""
+        self._loop = asyncio.get_running_loop()
+        workers = []
+        for site, queue in self.queues.items():
+            self._workers[site] = max(1, self.concurrency.get(site, 1))
+            for _ in range(self._workers[site]):
+                workers.append(asyncio.create_task(self._worker(queue)))
+
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+        done = sum(1 for job in self.jobs if job.status == "done")
+        failed = [job for job in self.jobs if job.status == "failed"]
+        logger.info(f"Scheduler finished: {done} jobs done, {len(failed)} failed")
+        for job in failed:
+            logger.error(f"Failed job: {job.site} {job.start_date} -> {job.end_date}: {job.error}")
+        return self.jobs
@@ -1,10 +1,25 @@
-from playwright.async_api import async_playwright, Page
+from playwright.async_api import Page
 from datetime import datetime
-from PIL import Image
-import numpy as np
-from typing import Dict, Optional, Tuple, List
-from parsers.vision_parser import parse_listing_screenshot
+from PIL import Image, ImageStat
+from typing import Awaitable, Callable, Dict, Optional, Tuple, List
+from parsers.vision_parser import parse_listing_screenshot_async
+from parsers.booking_parser import (
+    BOOKING_CARD_SELECTOR, BOOKING_LOAD_MORE_SELECTOR, booking_has_no_results, booking_page_urls, booking_result_count,
+    parse_booking_page
+)
+from parsers.airbnb_parser import airbnb_page_urls, parse_airbnb_page
+from scrapers.hotels import Listing
+from database.mongo_db import get_listing_key
+from utils.browser_pool import BrowserPool, PooledPage, get_browser_pool
+from utils.screenshot_store import ScreenshotStore
+from utils.resource_blocking import profile_for_url
+from utils.metrics import get_metrics
+from utils.pagination import dedupe_listings, load_more_results
+from utils.page_readiness import READY_TIMEOUT_MS, dismiss_cookie_consent, wait_until_ready
+from urllib.parse import urlparse
 
+import asyncio
+import io
 import logging
 import random
 import os
@@ -13,118 +28,120 @@ import os
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def is_blank_image(image_bytes: bytes, threshold: float = 250, sample_size: int = 64) -> bool:
+    """Check whether an image is (almost) entirely white
+
+    The mean brightness is computed on a small greyscale thumbnail instead of
+    the full-resolution pixel array.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        img.draft('L', (sample_size, sample_size))
+        thumbnail = img.convert('L').resize((sample_size, sample_size), Image.BILINEAR)
+    return ImageStat.Stat(thumbnail).mean[0] > threshold
+
+class PageCapture:
+    """What was read from a search's result pages: listings, and screenshots still to be parsed
+
+    `no_results` is set when the site itself said the search found nothing, so
+    an empty capture can be told apart from a page that failed to render.
+    """
+
+    def __init__(self, site: str, url: str, start_date: str, end_date: str):
+        self.site = site
+        self.url = url
+        self.start_date = start_date
+        self.end_date = end_date
+        self.captured_at = datetime.now().isoformat()
+        self.listings: List = []
+        self.screenshots: List[bytes] = []
+        self.pages = 1
+        self.no_results = False
+
 class PlaywrightScraper:
-    def __init__(self):
-        # Common user agents
-        self.user_agents = [
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        ]
-        
-        # Create screenshots directory if it doesn't exist
-        self.screenshots_dir = "data/screenshots"
-        os.makedirs(self.screenshots_dir, exist_ok=True)
-        
-        # Initialize browser session
-        self.browser = None
-        self.context = None
-        self.page = None
-        self.first_visit = True
-
-    async def start_browser(self) -> Page:
-        """Initialize the browser with anti-detection measures"""
-        if not self.browser:
-            playwright = await async_playwright().start()
-            self.browser = await playwright.chromium.launch(
-                headless=False,  # Set to False to avoid detection
-                args=[
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-features=IsolateOrigins,site-per-process'
-                ]
-            )
-            self.context = await self.browser.new_context(
-                user_agent=random.choice(self.user_agents),
-                viewport={'width': 1920, 'height': 1080},
-                java_script_enabled=True,
+    def __init__(self, browser_pool: Optional[BrowserPool] = None, save_screenshots: Optional[bool] = None,
+                 human_delay_ms: Optional[Tuple[int, int]] = None,
+                 vision_parser: Optional[Callable[[bytes], Awaitable[List[Listing]]]] = None,
+                 max_pages: Optional[int] = None, page_concurrency: Optional[int] = None,
+                 vision_max_pages: Optional[int] = None):
+        # Screenshots are kept in memory; keeping a copy on disk is optional
+        if save_screenshots is None:
+            save_screenshots = os.getenv('SAVE_SCREENSHOTS', '1').lower() not in ('0', 'false', 'no')
+        self.screenshot_store: Optional[ScreenshotStore] = None
+        if save_screenshots:
+            self.screenshot_store = ScreenshotStore(
+                directory="data/screenshots",
+                keep_last=int(os.getenv('SCREENSHOT_KEEP_LAST', '500')),
+                max_age_days=float(os.getenv('SCREENSHOT_MAX_AGE_DAYS', '30')),
             )
-            
-            # Add custom scripts to mask automation
-            await self.context.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-            """)
-            
-            self.page = await self.context.new_page()
-        return self.page
+        
+        # Pages come from the shared browser pool, so one scraper can serve
+        # several concurrent scrapes
+        self.browser_pool = browser_pool or get_browser_pool()
+
+        # Human-like jitter is a separate, small budget on top of the readiness waits
+        if human_delay_ms is None:
+            human_delay_ms = (int(os.getenv('HUMAN_DELAY_MIN_MS', '150')), int(os.getenv('HUMAN_DELAY_MAX_MS', '400')))
+        self.human_delay_ms = human_delay_ms
 
-    async def close_browser(self):
-        """Close all browser instances"""
-        if self.browser:
-            await self.browser.close()
-            self.browser = None
-            self.context = None
-            self.page = None
+        # Screenshot parser used when structured extraction finds nothing
+        self.vision_parser = vision_parser or parse_listing_screenshot_async
+
+        # Result pages read per search (1 = first page only), fetched a few at a time in the same context
+        self.max_pages = max(1, max_pages or int(os.getenv('MAX_RESULT_PAGES', '15')))
+        self.page_concurrency = max(1, page_concurrency or int(os.getenv('PAGE_CONCURRENCY', '3')))
+        # Each page read from a screenshot costs a Gemini call, so those pages have their own, lower cap
+        self.vision_max_pages = max(1, vision_max_pages or int(os.getenv('VISION_MAX_RESULT_PAGES', '1')))
+
+    async def human_pause(self, page: Page) -> None:
+        """Short random pause from the human jitter budget"""
+        await page.wait_for_timeout(random.randint(*self.human_delay_ms))
 
     async def add_human_behavior(self, page: Page):
         """Add random delays and mouse movements to simulate human behavior"""
         await page.mouse.move(random.randint(100, 500), random.randint(100, 500))
-        await page.wait_for_timeout(random.randint(1000, 2000))
+        await self.human_pause(page)
         await page.mouse.wheel(0, random.randint(300, 700))
-        await page.wait_for_timeout(random.randint(1000, 2000))
+        await self.human_pause(page)
 
     async def handle_cookie_consent(self, page: Page):
         """Handle cookie consent banner if present"""
         try:
-            cookie_selectors = [
-                "button[data-testid='accept-btn']",
-                "button:has-text('Accept')",
-                "button:has-text('Accept all')",
-                "button:has-text('Only necessary')",
-                "[aria-label='Only necessary']",
-                "#accept-cookies",
-            ]
-            
-            for selector in cookie_selectors:
-                try:
-                    cookie_button = await page.wait_for_selector(selector, timeout=5000)
-                    if cookie_button:
-                        logger.info(f"Found cookie consent button with selector: {selector}")
-                        await cookie_button.click()
-                        await page.wait_for_timeout(2000)
-                        break
-                except:
-                    continue
+            await dismiss_cookie_consent(page)
         except Exception as e:
             logger.warning(f"Could not handle cookie consent: {str(e)}")
 
-    async def get_screenshot(self, page: Page, selector: str, max_attempts: int = 3) -> Optional[str]:
-        """Take a screenshot of the specified element with retry logic"""
-        screenshot_path = None
-        
+    async def get_screenshot(self, page: Page, selector: str, max_attempts: int = 3) -> Optional[bytes]:
+        """Take a screenshot of the specified element with retry logic
+
+        Returns:
+            Optional[bytes]: PNG bytes of the element, None if every attempt was blank
+        """
+        with get_metrics().span('get_screenshot'):
+            return await self._get_screenshot(page, selector, max_attempts)
+
+    async def _get_screenshot(self, page: Page, selector: str, max_attempts: int) -> Optional[bytes]:
+        metrics = get_metrics()
         for attempt in range(max_attempts):
             logger.info(f"Screenshot attempt {attempt + 1}/{max_attempts}")
+            if attempt:
+                metrics.increment('screenshot_retries')
             
             try:
-                element = await page.wait_for_selector(selector, state='visible', timeout=60000)
+                element = await page.wait_for_selector(selector, state='visible', timeout=READY_TIMEOUT_MS)
                 if element:
                     await self.add_human_behavior(page)
                     
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    screenshot_filename = f"listing_screenshot_{timestamp}_attempt{attempt+1}.png"
-                    screenshot_path = os.path.join(self.screenshots_dir, screenshot_filename)
-                    await element.screenshot(path=screenshot_path)
-                    logger.info(f"Screenshot saved as {screenshot_path}")
+                    screenshot = await element.screenshot()
                     
                     # Verify screenshot is not blank/white
-                    img = Image.open(screenshot_path)
-                    img_array = np.array(img)
-                    
-                    if np.mean(img_array) > 250:
+                    if is_blank_image(screenshot):
                         logger.warning("Screenshot appears to be blank/white, retrying...")
                         continue
                     
-                    return screenshot_path
+                    metrics.observe('screenshot_bytes', len(screenshot))
+                    if self.screenshot_store:
+                        self.screenshot_store.submit(screenshot, label=f"attempt{attempt+1}")
+                    return screenshot
                 else:
                     logger.warning("Element not found, retrying...")
             except Exception as e:
@@ -132,81 +149,188 @@ class PlaywrightScraper:
                 if attempt == max_attempts - 1:
                     raise
             
-            await page.wait_for_timeout(random.randint(3000, 5000))
-            await page.reload()
+            await self.human_pause(page)
+            await page.reload(wait_until='domcontentloaded')
+            await wait_until_ready(page, selector)
             await self.add_human_behavior(page)
         
         return None
 
+    async def close(self) -> None:
+        """Flush screenshots that are still waiting to be written"""
+        if self.screenshot_store:
+            await self.screenshot_store.close()
+
+    async def capture_airbnb(self, page: Page) -> Tuple[List[Listing], Optional[bytes]]:
+        """Extract Airbnb listings from the page data, or take the screenshot for the Vision parser
+
+        Returns:
+            Tuple[List[Listing], Optional[bytes]]: Structured listings, or no listings and the screenshot
+        """
+        try:
+            listings = await parse_airbnb_page(page)
+            if listings:
+                return listings, None
+        except Exception as e:
+            logger.warning(f"Structured Airbnb extraction failed: {str(e)}")
+
+        logger.info("No structured Airbnb data found, falling back to the Vision parser")
+        return [], await self.get_screenshot(page, "#site-content")
+
+    async def capture_page(self, url: str, start_date: str, end_date: str) -> PageCapture:
+        """Load a page and read what is needed from it, releasing the browser before any Vision parsing
+
+        Raises:
+            Exception: If the page could not be loaded or read
+        """
+        profile = profile_for_url(url)
+        with get_metrics().span('capture', site=profile.name if profile else "unknown"):
+            async with self.browser_pool.checkout() as slot:
+                return await self._capture_slot(slot, url, start_date, end_date)
+
+    async def parse_capture(self, capture: PageCapture) -> Tuple[str, List[Dict]]:
+        """Turn a capture into listing documents, running the Vision parser on its screenshots
+
+        Listings that show up on more than one result page are kept once.
+        """
+        listings = list(capture.listings)
+        if capture.screenshots:
+            for parsed in await asyncio.gather(*(self.vision_parser(shot) for shot in capture.screenshots)):
+                listings.extend(parsed)
+
+        if capture.site == "airbnb":
+            listings = dedupe_listings(listings, lambda listing: get_listing_key(listing.model_dump()))
+            listings = [
+                {
+                    'timestamp': capture.captured_at,
+                    'url': capture.url,
+                    'start_date': capture.start_date,
+                    'end_date': capture.end_date,
+                    'listing': listing.model_dump()
+                }
+                for listing in listings
+            ]
+            if listings:
+                logger.info(f"Successfully parsed {len(listings)} listings")
+        else:
+            listings = dedupe_listings(listings, get_listing_key)
+
+        get_metrics().observe('listings_per_window', len(listings), site=capture.site)
+        return capture.site, listings
+
     async def scrape_page(self, url: str, start_date: str, end_date: str) -> Tuple[str, List[Dict]]:
-        """Scrape a page and return the screenshot path if successful"""
+        """Scrape a page and return the site name and the listings found"""
+        profile = profile_for_url(url)
         try:
-            page = await self.start_browser()
-            
-            logger.info(f"Navigating to {url}")
-            await page.goto(url)
-            
-            # Initial wait and human-like behavior
-            await page.wait_for_timeout(5000)
-            await self.add_human_behavior(page)
-            
-            # Handle cookie consent only on first visit
-            if self.first_visit:
-                await self.handle_cookie_consent(page)
-                self.first_visit = False
-            
-            if "booking.com" in page.url:
-                hotels = await page.locator("//div[@data-testid='property-card']").all()
-                print(f"Found {len(hotels)} hotels")
-                listings = []
-                for hotel in hotels:
-                    hotel_dict = {}
-                    hotel_dict['timestamp'] = datetime.now().isoformat()
-                    hotel_dict['url'] = url
-                    hotel_dict['start_date'] = start_date
-                    hotel_dict['end_date'] = end_date
-                    
-                    # Properly await all locator operations
-                    title_element = hotel.locator("//div[@data-testid='title']")
-                    price_element = hotel.locator("//span[@data-testid='price-and-discounted-price']")
-                    rating_element = hotel.locator("//div[@data-testid='review-score']")
-                    beds_element = hotel.locator("//div[@data-testid='recommended-units']")
-                    
-                    # Get text content with proper awaiting
-                    hotel_dict['name'] = await title_element.inner_text() if await title_element.count() > 0 else "N/A"
-                    price_text = await price_element.inner_text() if await price_element.count() > 0 else "N/A"
-                    price_float = float(price_text.replace(u'€\xa0', u'').replace(",", ".")) if price_text != "N/A" else "N/A"
-                    hotel_dict['price'] = price_float
-                    
-                    rating_text = await rating_element.inner_text() if await rating_element.count() > 0 else "N/A"
-                    hotel_dict['rating'] = rating_text.split('\n')[1].strip() if rating_text != "N/A" else "N/A"
-                    
-                    hotel_dict['bed_configuration'] = await beds_element.inner_text() if await beds_element.count() > 0 else "N/A"
-                    
-                    print(hotel_dict)
-                    listings.append(hotel_dict)
-                return "booking", listings
-            elif "airbnb.com" in page.url:
-                screenshot_path = await self.get_screenshot(page, "#site-content")
-                if screenshot_path:
-                    # Parse the screenshot using Vision AI
-                    parsed_listings = parse_listing_screenshot(screenshot_path)
-                    if parsed_listings:
-                        listings = []
-                        for listing in parsed_listings:
-                            listings.append({
-                                'timestamp': datetime.now().isoformat(),
-                                'url': url,
-                                'start_date': start_date,
-                                'end_date': end_date,
-                                'listing': listing.model_dump()
-                            })
-                        logger.info(f"Successfully parsed {len(parsed_listings)} listings")
-                        return "airbnb", listings
-                return "airbnb", []
-            
-            return "none", []
-            
+            with get_metrics().span('scrape_page', site=profile.name if profile else "unknown"):
+                capture = await self.capture_page(url, start_date, end_date)
+                return await self.parse_capture(capture)
         except Exception as e:
             logger.error(f"Error scraping page: {str(e)}")
-            return "none", []
\ No newline at end of file
+            return "none", []
+
+    async def _capture_slot(self, slot: PooledPage, url: str, start_date: str, end_date: str) -> PageCapture:
+        """Load and read a page on a browser page checked out from the pool"""
+        page = slot.page
+        logger.info(f"Navigating to {url}")
+        slot.routing_profile = profile_for_url(url)
+        slot.navigations += 1
+        metrics = get_metrics()
+        site = slot.routing_profile.name if slot.routing_profile else "unknown"
+        with metrics.span('navigate', site=site):
+            await page.goto(url, wait_until='domcontentloaded')
+            # Wait for the results to render
+            await wait_until_ready(page)
+
+        # A little human-like behavior
+        await self.add_human_behavior(page)
+        
+        # Handle cookie consent only on the first visit to a site in this context
+        site_host = urlparse(page.url).netloc
+        if site_host not in slot.consent_handled:
+            with metrics.span('cookie_consent', site=site):
+                await self.handle_cookie_consent(page)
+            slot.consent_handled.add(site_host)
+        
+        capture = PageCapture("none", url, start_date, end_date)
+        if "booking.com" in page.url:
+            capture.site = "booking"
+            with metrics.span('extract', site="booking"):
+                capture.listings = await parse_booking_page(page, url, start_date, end_date)
+                if not capture.listings:
+                    capture.no_results = await booking_has_no_results(page)
+        elif "airbnb.com" in page.url:
+            capture.site = "airbnb"
+            with metrics.span('extract', site="airbnb"):
+                capture.listings, screenshot = await self.capture_airbnb(page)
+            if screenshot:
+                capture.screenshots.append(screenshot)
+
+        if capture.site != "none" and self.max_pages > 1 and not capture.no_results:
+            with metrics.span('paginate', site=capture.site):
+                await self._capture_more_pages(slot, capture)
+            metrics.observe('result_pages', capture.pages, site=capture.site)
+        return capture
+
+    async def _capture_more_pages(self, slot: PooledPage, capture: PageCapture) -> None:
+        """Add the listings of every further result page to a capture
+
+        Numbered pages are loaded concurrently in extra pages of the same
+        context. A Booking search without a result count grows its list in
+        place, so it is scrolled instead. Airbnb pages that have to be read
+        from screenshots stop at `vision_max_pages`.
+        """
+        if capture.site == "booking":
+            total = await booking_result_count(slot.page)
+            if total is None:
+                cards = await load_more_results(slot.page, BOOKING_CARD_SELECTOR, BOOKING_LOAD_MORE_SELECTOR,
+                                                self.max_pages - 1)
+                if cards > len(capture.listings):
+                    capture.listings = await parse_booking_page(slot.page, capture.url, capture.start_date,
+                                                                capture.end_date)
+                return
+            urls = booking_page_urls(capture.url, total, max_pages=self.max_pages)
+        else:
+            max_pages = self.max_pages
+            if capture.screenshots:
+                # The first page had no structured data, so the others are unlikely to have any
+                max_pages = min(max_pages, self.vision_max_pages)
+            urls = await airbnb_page_urls(slot.page, capture.url, max_pages=max_pages) if max_pages > 1 else []
+        if not urls:
+            return
+
+        semaphore = asyncio.Semaphore(self.page_concurrency)
+
+        async def fetch(url: str) -> Tuple[List, Optional[bytes]]:
+            async with semaphore:
+                return await self._capture_extra_page(slot, url, capture)
+
+        results = await asyncio.gather(*(fetch(url) for url in urls), return_exceptions=True)
+        slot.navigations += len(urls)
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Skipping result page {url}: {str(result)}")
+                get_metrics().increment('page_failures', site=capture.site)
+                continue
+            listings, screenshot = result
+            if screenshot and len(capture.screenshots) >= self.vision_max_pages:
+                logger.info(f"Skipping result page {url}: it needs the Vision parser and "
+                            f"VISION_MAX_RESULT_PAGES={self.vision_max_pages} is reached")
+                continue
+            capture.listings.extend(listings)
+            if screenshot:
+                capture.screenshots.append(screenshot)
+            capture.pages += 1
+        logger.info(f"Read {capture.pages} {capture.site} result pages")
+
+    async def _capture_extra_page(self, slot: PooledPage, url: str, capture: PageCapture) -> Tuple[List, Optional[bytes]]:
+        """Load one further result page in a new page of the slot's context"""
+        page = await self.browser_pool.new_page(slot)
+        try:
+            await page.goto(url, wait_until='domcontentloaded')
+            await wait_until_ready(page)
+            if capture.site == "booking":
+                return await parse_booking_page(page, url, capture.start_date, capture.end_date), None
+            return await self.capture_airbnb(page)
+        finally:
+            await page.close()
@@ -0,0 +1,171 @@
+from PIL import Image, features
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional, Tuple
+
+import asyncio
+import io
+import logging
+import os
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def perceptual_hash(img: Image.Image, hash_size: int = 8) -> int:
+    """Difference hash (dHash) of an image as a 64-bit integer"""
+    small = img.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class ScreenshotStore:
+    """Bounded on-disk store for listing screenshots
+
+    Screenshots are handed over as bytes and processed by a background worker:
+    near-duplicates of recent captures are dropped using a perceptual hash,
+    the rest are re-encoded as lossless WebP (optimised PNG when WebP is not
+    available) and the directory is pruned to the configured retention.
+    """
+
+    def __init__(
+        self,
+        directory: str = "data/screenshots",
+        keep_last: int = 500,
+        max_age_days: float = 30,
+        max_hash_distance: int = 4,
+        queue_size: int = 20,
+    ):
+        """
+        Args:
+            directory (str): Where screenshots are written
+            keep_last (int): Maximum number of screenshots kept, oldest removed first
+            max_age_days (float): Screenshots older than this are removed
+            max_hash_distance (int): Captures within this dHash distance of a recent one are skipped
+            queue_size (int): Pending screenshots before new ones are dropped
+        """
+        self.directory = directory
+        self.keep_last = keep_last
+        self.max_age = max_age_days * 86400
+        self.max_hash_distance = max_hash_distance
+        self.queue_size = queue_size
+        self.extension = 'webp' if features.check('webp') else 'png'
+        self.recent_hashes: Deque[int] = deque(maxlen=50)
+        self.saved = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_recent_hashes()
+
+    def _load_recent_hashes(self) -> None:
+        # File names end with the hash, so dedup survives restarts
+        for _, path in self._list_files()[-self.recent_hashes.maxlen:]:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            try:
+                self.recent_hashes.append(int(stem.rsplit('_', 1)[-1], 16))
+            except ValueError:
+                continue
+
+    def _list_files(self) -> List[Tuple[float, str]]:
+        """Screenshots in the store, oldest first"""
+        files = []
+        for name in os.listdir(self.directory):
+            if name.startswith('listing_screenshot_'):
+                path = os.path.join(self.directory, name)
+                files.append((os.path.getmtime(path), path))
+        return sorted(files)
+
+    def submit(self, image_bytes: bytes, label: str = "") -> bool:
+        """Queue a screenshot for storage without waiting for it to be written
+
+        Returns:
+            bool: False if the queue was full and the screenshot was dropped
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._worker = asyncio.create_task(self._run())
+        try:
+            self._queue.put_nowait((image_bytes, label))
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("Screenshot store queue is full, dropping screenshot")
+            return False
+
+    async def _run(self) -> None:
+        while True:
+            image_bytes, label = await self._queue.get()
+            try:
+                await asyncio.to_thread(self._store, image_bytes, label)
+            except Exception as e:
+                logger.error(f"Failed to store screenshot: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _store(self, image_bytes: bytes, label: str) -> Optional[str]:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            image_hash = perceptual_hash(img)
+            if any(hamming_distance(image_hash, h) <= self.max_hash_distance for h in self.recent_hashes):
+                self.duplicates += 1
+                logger.info("Screenshot is a near-duplicate of a recent capture, not saving")
+                return None
+
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            suffix = f"_{label}" if label else ""
+            filename = f"listing_screenshot_{timestamp}{suffix}_{image_hash:016x}.{self.extension}"
+            path = os.path.join(self.directory, filename)
+            if self.extension == 'webp':
+                img.save(path, 'WEBP', lossless=True, method=4)
+            else:
+                img.save(path, 'PNG', optimize=True)
+
+        self.recent_hashes.append(image_hash)
+        self.saved += 1
+        logger.info(f"Screenshot saved as {path}")
+        self.prune()
+        return path
+
+    def prune(self) -> int:
+        """Apply the retention policy
+
+        Returns:
+            int: Number of screenshots removed
+        """
+        files = self._list_files()
+        cutoff = time.time() - self.max_age
+        expired = [path for mtime, path in files if mtime < cutoff]
+        kept = [path for mtime, path in files if mtime >= cutoff]
+        if self.keep_last is not None and len(kept) > self.keep_last:
+            expired += kept[:len(kept) - self.keep_last]
+
+        for path in expired:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not remove {path}: {str(e)}")
+        return len(expired)
+
+    async def close(self) -> None:
+        """Wait for queued screenshots to be written and stop the worker"""
+        if self._queue is not None:
+            await self._queue.join()
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        self._queue = None
+        logger.info(f"Screenshot store: {self.saved} saved, {self.duplicates} duplicates, {self.dropped} dropped")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules import each other from src/, as when running src/main.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
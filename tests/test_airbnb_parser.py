@@ -0,0 +1,79 @@
+from parsers.airbnb_parser import (
+    decode_listing_id, normalise_airbnb_card, parse_airbnb_html, parse_amount, parse_page_cursors, parse_rating,
+    room_id_from_link
+)
+
+import json
+import os
+import re
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def test_parse_airbnb_html_reads_the_embedded_search_state():
+    listings = parse_airbnb_html(load_fixture('airbnb_search.html'))
+
+    assert [listing.model_dump() for listing in listings] == [
+        {'name': 'Casa da Ponte', 'price': 95.0, 'rating': 4.92,
+         'bed_configuration': '2 bedrooms · 3 beds', 'listing_id': '51234567'},
+        {'name': 'Refúgio do Rio', 'price': 1180.0, 'rating': 0.0,
+         'bed_configuration': '1 queen bed', 'listing_id': '887766'},
+    ]
+
+
+def test_parse_airbnb_html_without_search_state():
+    assert parse_airbnb_html('<html><body><div id="site-content"></div></body></html>') == []
+
+
+def test_parse_page_cursors_from_the_fixture():
+    body = re.search(r'id="data-deferred-state-0"[^>]*>(.*?)</script>', load_fixture('airbnb_search.html'), re.DOTALL)
+    assert len(parse_page_cursors(json.loads(body.group(1)))) == 3
+
+
+def test_parse_amount():
+    assert parse_amount('€95 night') == 95.0
+    assert parse_amount('€ 1,234 total') == 1234.0
+    assert parse_amount('€1.234,50') == 1234.5
+    assert parse_amount('95,50 €') == 95.5
+    assert parse_amount('€ 120') == 120.0
+    assert parse_amount('per night') is None
+    assert parse_amount(None) is None
+
+
+def test_parse_rating():
+    assert parse_rating('4.92 (118)') == 4.92
+    assert parse_rating('4,8 out of 5 average rating') == 4.8
+    assert parse_rating('New') == 0.0
+    assert parse_rating(None) == 0.0
+
+
+def test_decode_listing_id():
+    assert decode_listing_id('887766') == '887766'
+    assert decode_listing_id(887766) == '887766'
+    assert decode_listing_id('RGVtYW5kU3RheUxpc3Rpbmc6NTEyMzQ1Njc=') == '51234567'
+    assert decode_listing_id('not an id') is None
+    assert decode_listing_id(None) is None
+    assert decode_listing_id(True) is None
+
+
+def test_room_id_from_link():
+    assert room_id_from_link('/rooms/12345?check_in=2025-06-01') == '12345'
+    assert room_id_from_link('https://www.airbnb.com/rooms/plus/678') == '678'
+    assert room_id_from_link('/experiences/12345') is None
+    assert room_id_from_link(None) is None
+
+
+def test_normalise_airbnb_card():
+    listing = normalise_airbnb_card({
+        'name': ' Casa da Ponte ', 'price': '€95 night', 'rating': '4.92 (118)',
+        'beds': '3 beds', 'link': '/rooms/51234567?adults=2',
+    })
+    assert listing.model_dump() == {
+        'name': 'Casa da Ponte', 'price': 95.0, 'rating': 4.92, 'bed_configuration': '3 beds', 'listing_id': '51234567'
+    }
+    assert normalise_airbnb_card({'name': 'No price', 'price': None}) is None
@@ -0,0 +1,75 @@
+from parsers.booking_parser import (
+    booking_page_urls, hotel_id_from_link, normalise_booking_card, parse_price, parse_rating, parse_result_count
+)
+from urllib.parse import parse_qs, urlparse
+
+SEARCH_URL = 'https://www.booking.com/searchresults.en-gb.html?ss=Geres&checkin=2025-06-01&checkout=2025-06-02'
+
+
+def test_parse_price():
+    assert parse_price('€ 1,234') == 1234.0
+    assert parse_price('€ 89') == 89.0
+    assert parse_price('US$89.50') == 89.5
+    assert parse_price('95 €') == 95.0
+    assert parse_price('£1.234,50') == 1234.5
+
+
+def test_parse_price_takes_the_current_price_of_a_discount():
+    assert parse_price('€ 120\n€ 95') == 95.0
+
+
+def test_parse_price_ignores_amounts_without_a_currency():
+    assert parse_price('1 night, 2 adults\n€ 210\n+€ 10 taxes and charges') == 210.0
+    assert parse_price('1 night, 2 adults') == 'N/A'
+    assert parse_price('') == 'N/A'
+    assert parse_price(None) == 'N/A'
+
+
+def test_parse_rating():
+    assert parse_rating('Scored 8.6\n8.6\nFabulous\n1,024 reviews') == '8.6'
+    assert parse_rating('9.1') == '9.1'
+    assert parse_rating(None) == 'N/A'
+
+
+def test_hotel_id_from_link():
+    assert hotel_id_from_link('https://www.booking.com/hotel/pt/casa-do-geres.en-gb.html?aid=304142') == 'pt/casa-do-geres'
+    assert hotel_id_from_link('/hotel/pt/quinta-da-ponte.html') == 'pt/quinta-da-ponte'
+    assert hotel_id_from_link('/searchresults.html') is None
+    assert hotel_id_from_link(None) is None
+
+
+def test_normalise_booking_card():
+    listing = normalise_booking_card(
+        {'name': 'Casa do Gerês', 'price': '€ 95', 'rating': None, 'bed_configuration': None,
+         'link': '/hotel/pt/casa-do-geres.en-gb.html'},
+        SEARCH_URL, '2025-06-01', '2025-06-02'
+    )
+    assert listing['name'] == 'Casa do Gerês'
+    assert listing['price'] == 95.0
+    assert listing['rating'] == 'N/A'
+    assert listing['bed_configuration'] == 'N/A'
+    assert listing['listing_id'] == 'pt/casa-do-geres'
+    assert (listing['start_date'], listing['end_date']) == ('2025-06-01', '2025-06-02')
+
+
+def test_parse_result_count():
+    assert parse_result_count('Gerês: 143 properties found') == 143
+    assert parse_result_count('Portugal: 1,204 properties found') == 1204
+    assert parse_result_count('Gerês: 1 property found') == 1
+    assert parse_result_count('Gerês: 0 properties found') == 0
+    assert parse_result_count('Search results') is None
+    assert parse_result_count(None) is None
+
+
+def test_booking_page_urls():
+    urls = booking_page_urls(SEARCH_URL, total=60)
+
+    assert [parse_qs(urlparse(url).query)['offset'] for url in urls] == [['25'], ['50']]
+    assert all(parse_qs(urlparse(url).query)['checkin'] == ['2025-06-01'] for url in urls)
+
+
+def test_booking_page_urls_limits():
+    assert booking_page_urls(SEARCH_URL, total=25) == []
+    assert booking_page_urls(SEARCH_URL, total=0) == []
+    assert len(booking_page_urls(SEARCH_URL, total=1000, max_pages=3)) == 2
+    assert booking_page_urls(SEARCH_URL, total=1000, max_pages=1) == []
@@ -0,0 +1,27 @@
+from database.mongo_db import get_listing_key, get_listing_name, normalise_name
+
+
+def test_normalise_name():
+    assert normalise_name('  Casa do  Gerês ') == 'casa do geres'
+    assert normalise_name(None) == ''
+
+
+def test_get_listing_name_for_both_document_shapes():
+    assert get_listing_name({'name': 'Casa do Gerês'}) == 'Casa do Gerês'
+    assert get_listing_name({'listing': {'name': 'Refúgio do Rio'}}) == 'Refúgio do Rio'
+    assert get_listing_name({}) == ''
+
+
+def test_get_listing_key_prefers_the_site_id():
+    assert get_listing_key({'name': 'Casa', 'price': 95.0, 'listing_id': 'pt/casa'}) == 'id:pt/casa'
+    assert get_listing_key({'listing': {'name': 'Casa', 'price': 95.0, 'listing_id': '887766'}}) == 'id:887766'
+
+
+def test_get_listing_key_falls_back_to_name_and_price():
+    assert get_listing_key({'name': 'Casa do Gerês', 'price': 95.0}) == 'name:casa do geres|95.0'
+    assert get_listing_key({'listing': {'name': 'CASA do Gerês', 'price': 95.0}}) == 'name:casa do geres|95.0'
+
+
+def test_get_listing_key_skips_placeholder_names():
+    assert get_listing_key({'name': 'N/A', 'price': 'N/A'}) is None
+    assert get_listing_key({'name': '', 'price': 95.0}) is None
@@ -0,0 +1,27 @@
+from utils.pagination import dedupe_listings, set_query_param
+from urllib.parse import parse_qsl, urlparse
+
+
+def test_dedupe_listings_keeps_the_first_occurrence():
+    listings = [{'id': 'a', 'page': 1}, {'id': 'b', 'page': 1}, {'id': 'a', 'page': 2}]
+
+    assert dedupe_listings(listings, lambda listing: listing['id']) == [{'id': 'a', 'page': 1}, {'id': 'b', 'page': 1}]
+
+
+def test_dedupe_listings_keeps_every_listing_without_a_key():
+    listings = [{'id': None}, {'id': None}, {'id': 'a'}, {'id': 'a'}]
+
+    assert dedupe_listings(listings, lambda listing: listing['id']) == [{'id': None}, {'id': None}, {'id': 'a'}]
+
+
+def test_set_query_param_replaces_an_existing_value():
+    url = set_query_param('https://www.booking.com/searchresults.html?ss=Geres&offset=25', 'offset', 50)
+
+    assert parse_qsl(urlparse(url).query) == [('ss', 'Geres'), ('offset', '50')]
+
+
+def test_set_query_param_adds_a_value():
+    url = set_query_param('https://www.airbnb.com/s/Geres/homes', 'cursor', 'abc')
+
+    assert urlparse(url).path == '/s/Geres/homes'
+    assert parse_qsl(urlparse(url).query) == [('cursor', 'abc')]
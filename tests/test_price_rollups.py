@@ -0,0 +1,60 @@
+from database.price_rollups import QuantileSketch, SKETCH_ACCURACY, build_rollups, get_scrape_day, merge_rollups
+
+import pytest
+
+
+def test_quantile_sketch_is_within_the_relative_accuracy():
+    sketch = QuantileSketch()
+    values = list(range(1, 1001))
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.25, 0.5, 0.9):
+        expected = values[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(expected, rel=SKETCH_ACCURACY + 0.001)
+
+
+def test_quantile_sketch_merge_matches_a_single_sketch():
+    whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for value in range(50, 500, 7):
+        whole.add(value)
+        (left if value % 2 else right).add(value)
+    left.merge(right)
+
+    assert left.buckets == whole.buckets
+    assert left.quantile(0.5) == whole.quantile(0.5)
+
+
+def test_empty_quantile_sketch():
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_get_scrape_day():
+    assert get_scrape_day({'timestamp': '2025-05-01T10:00:00'}) == '2025-05-01'
+    assert get_scrape_day({'inserted_at': '2025-05-02T08:00:00'}) == '2025-05-02'
+    assert get_scrape_day({}, '2025-05-03T00:00:00') == '2025-05-03'
+
+
+def test_build_and_merge_rollups():
+    listings = [
+        {'start_date': '2025-06-01', 'timestamp': '2025-05-01T10:00', 'price': 100.0},
+        {'start_date': '2025-06-01', 'timestamp': '2025-05-01T11:00', 'price': 200.0},
+        {'start_date': '2025-06-02', 'timestamp': '2025-05-01T11:00', 'price': 150.0},
+        {'start_date': '2025-06-02', 'timestamp': '2025-05-01T11:00', 'price': 'N/A'},
+    ]
+    rollups = build_rollups('booking', listings, 'price')
+    assert sorted(rollups) == [('2025-06-01', '2025-05-01'), ('2025-06-02', '2025-05-01')]
+
+    documents = []
+    for rollup in rollups.values():
+        documents.append({**rollup, 'sketch': rollup['sketch'].buckets})
+    stats = merge_rollups(documents)
+
+    assert stats['count'] == 3
+    assert stats['average_price'] == 150.0
+    assert (stats['lowest_price'], stats['highest_price']) == (100.0, 200.0)
+    assert stats['quantiles']['p50'] == pytest.approx(150.0, rel=SKETCH_ACCURACY)
+
+
+def test_merge_no_rollups():
+    assert merge_rollups([])['count'] == 0
@@ -0,0 +1,81 @@
+from utils.scheduler import DateWindowScheduler, ScrapeJob, TokenBucket, iter_date_windows
+
+import asyncio
+import pytest
+import time
+
+
+def test_token_bucket_rejects_a_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_token_bucket_allows_a_burst_up_to_its_capacity():
+    async def burst() -> float:
+        bucket = TokenBucket(rate=1, capacity=3)
+        started = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(burst()) < 0.1
+
+
+def test_token_bucket_waits_for_a_refill():
+    async def paced() -> float:
+        bucket = TokenBucket(rate=20, capacity=1)
+        await bucket.acquire()
+        started = time.monotonic()
+        await bucket.acquire()
+        await bucket.acquire()
+        return time.monotonic() - started
+
+    # Two more tokens at 20 per second take about 0.1s
+    assert asyncio.run(paced()) >= 0.09
+
+
+def test_iter_date_windows():
+    assert iter_date_windows('2025-06-30', '2025-07-02') == [
+        ('2025-06-30', '2025-07-01'), ('2025-07-01', '2025-07-02'), ('2025-07-02', '2025-07-03'),
+    ]
+    assert iter_date_windows('2025-06-01', '2025-06-01', nights=3) == [('2025-06-01', '2025-06-04')]
+    assert iter_date_windows('2025-06-02', '2025-06-01') == []
+
+
+def run_scheduler(handler, max_retries: int) -> ScrapeJob:
+    scheduler = DateWindowScheduler(handler, concurrency={'booking': 1}, rate_limits={}, jitter=(0, 0),
+                                    max_retries=max_retries)
+    scheduler.add_job(ScrapeJob('booking', 'https://www.booking.com/', '2025-06-02', '2025-06-03'))
+    return asyncio.run(scheduler.run())[0]
+
+
+def deferred_handler(outcomes):
+    """Handler that returns at once and reports each attempt's outcome later from another thread"""
+    async def handler(job, on_finished):
+        success, count, error = outcomes[job.attempts - 1]
+        asyncio.get_running_loop().run_in_executor(None, on_finished, success, count, error)
+        return None
+    return handler
+
+
+def test_scheduler_retries_a_job_that_fails_after_the_handler_returned():
+    job = run_scheduler(deferred_handler([(False, 0, 'Failed to parse listings: 503'), (True, 12, None)]), 1)
+
+    assert (job.status, job.attempts, job.listings_count, job.error) == ('done', 2, 12, None)
+
+
+def test_scheduler_keeps_the_error_of_a_deferred_failure():
+    job = run_scheduler(deferred_handler([(False, 0, 'Failed to parse listings: 503')] * 2), 1)
+
+    assert (job.status, job.attempts, job.error) == ('failed', 2, 'Failed to parse listings: 503')
+
+
+def test_scheduler_retries_a_handler_exception():
+    async def handler(job, on_finished):
+        if job.attempts == 1:
+            raise RuntimeError('page did not load')
+        return 7
+
+    job = run_scheduler(handler, 1)
+    assert (job.status, job.attempts, job.listings_count) == ('done', 2, 7)
+    assert run_scheduler(handler, 0).error == 'page did not load'